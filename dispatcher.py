@@ -0,0 +1,214 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from models import db, Website, User
+from due_queue import DueQueue
+from fairshare import FairQueue, CHECK_CAPACITY, DEFAULT_USER_QUOTA, split_share
+from profiling import load_profiler_settings, publish_slow_checks
+from tasks import check_website_changes, fetch_cache
+
+logger = logging.getLogger(__name__)
+
+# How often websites added or edited in the web process are picked up
+DUE_QUEUE_SYNC_SECONDS = float(os.getenv('DUE_QUEUE_SYNC_SECONDS', 5))
+# Rows committed up to this long after their updated_at are still seen by the next sync
+SYNC_OVERLAP = timedelta(seconds=30)
+SYNC_BATCH_SIZE = 10000
+# A check that fails without recording last_check is retried after this long
+RETRY_SECONDS = 60
+# Capacity, quotas and profiler settings are per minute
+WINDOW_SECONDS = 60
+
+DUE_COLUMNS = (Website.id, Website.user_id, Website.last_check, Website.check_interval, Website.date_added)
+
+def due_timestamp(last_check, check_interval, date_added, now):
+    """Same rule as Website.due_at_utc, from raw column values"""
+    if last_check is not None:
+        return last_check.replace(tzinfo=timezone.utc).timestamp() + check_interval * 3600
+    if date_added is not None:
+        return date_added.replace(tzinfo=timezone.utc).timestamp()
+    return now
+
+class CheckDispatcher:
+    """Runs every website check at its due time.
+
+    Due times live in a DueQueue that is loaded from the database once and
+    then kept up to date: checks reschedule their own website, and websites
+    added, edited or given a new interval in the web process are read back
+    every DUE_QUEUE_SYNC_SECONDS through Website.updated_at. Deleted
+    websites drop out when they come due. Between syncs the dispatcher
+    sleeps until the next website is due.
+
+    Due checks are shared across users through a FairQueue. CHECK_CAPACITY
+    is refilled continuously as a token bucket, and each user's quota
+    applies per minute. With several check workers, `shard` returns this
+    worker's (index, number of workers), and the worker gets its part of the
+    capacity and of each user's quota, so the totals hold across workers.
+    """
+
+    def __init__(self, app, owns=None, shard=None):
+        self.app = app
+        self.owns = owns
+        self.shard = shard
+        self.queue = DueQueue()
+        self.fair_queue = FairQueue()
+        self.synced_at = None
+        self._reload = threading.Event()
+        self.next_sync = 0.0
+        self.next_window = 0.0
+        self.capacity = CHECK_CAPACITY  # this worker's part, per minute
+        self.tokens = float(CHECK_CAPACITY)
+        self.refilled_at = time.time()
+        self.minute = 0  # rotates which workers get the remainders of uneven splits
+        self.served = {}       # user id -> checks dispatched in the current minute
+        self.user_shares = {}  # user id -> (weight, quota)
+
+    def reload(self):
+        """Rebuild the queue from the database on the next sync, e.g. after a shard rebalance"""
+        self._reload.set()
+
+    def sync(self):
+        """Load new and changed websites into the queue; everything on the first call or after reload()"""
+        started = datetime.now(timezone.utc)
+        now = started.timestamp()
+        full = self.synced_at is None or self._reload.is_set()
+        self._reload.clear()
+
+        query = db.session.query(*DUE_COLUMNS)
+        if full:
+            self.queue.clear()
+        else:
+            query = query.filter(Website.updated_at >= self.synced_at - SYNC_OVERLAP)
+
+        count = 0
+        for website_id, user_id, last_check, check_interval, date_added in query.yield_per(SYNC_BATCH_SIZE):
+            if self.owns is not None and not self.owns(website_id):
+                self.queue.remove(website_id)
+                continue
+            self.queue.schedule(website_id, user_id, due_timestamp(last_check, check_interval, date_added, now))
+            count += 1
+
+        self.synced_at = started
+        if full:
+            logger.info(f"Loaded {count} websites into the due queue ({self.queue.nbytes()} bytes)")
+        elif count:
+            logger.debug(f"Synced {count} changed websites into the due queue")
+
+    def start_window(self):
+        """Reset per-minute quotas and refresh user shares and profiler settings"""
+        self.served = {}
+        self.minute = int(time.time() // WINDOW_SECONDS)
+        self.user_shares = {
+            user_id: (weight, DEFAULT_USER_QUOTA if quota is None else quota)
+            for user_id, weight, quota in db.session.query(User.id, User.check_weight, User.check_quota)
+        }
+        try:
+            load_profiler_settings()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error loading profiler settings: {str(e)}")
+        try:
+            publish_slow_checks()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error publishing slow checks: {str(e)}")
+        logger.info(f"Due queue: {len(self.queue)} websites; fetch cache: {fetch_cache.stats()}")
+
+    def dispatch(self, now):
+        """Check the websites due by `now` that fit the capacity and quotas; returns how many"""
+        index, workers = self.shard() if self.shard else (0, 1)
+        self.capacity = split_share(CHECK_CAPACITY, workers, index + self.minute)
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled_at) * self.capacity / WINDOW_SECONDS)
+        self.refilled_at = now
+        available = int(self.tokens)
+        if available < 1:
+            return 0
+
+        self.fair_queue.reset()
+        due_at = {}
+        for user_id in self.queue.due_users(now):
+            weight, quota = self.user_shares.get(user_id, (1.0, DEFAULT_USER_QUOTA))
+            remaining = split_share(quota, workers, index + user_id + self.minute) - self.served.get(user_id, 0)
+            if remaining <= 0:
+                continue
+            entries = self.queue.due(user_id, now, min(remaining, available))
+            due_at.update((website_id, due) for due, website_id in entries)
+            self.fair_queue.enqueue(user_id, [website_id for _, website_id in entries], weight=weight, quota=remaining)
+
+        website_ids = self.fair_queue.dequeue(available)
+        if not website_ids:
+            return 0
+        owners = {website_id: self.queue.site_users[website_id] for website_id in website_ids}
+        for website_id in website_ids:
+            self.queue.remove(website_id)
+        for user_id, served in self.fair_queue.served.items():
+            self.served[user_id] = self.served.get(user_id, 0) + served
+        self.tokens -= len(website_ids)
+
+        lag = now - min(due_at[website_id] for website_id in website_ids)
+        logger.info(f"Dispatching {len(website_ids)} due website checks, most overdue by {lag:.3f}s")
+        try:
+            check_website_changes(website_ids)
+        finally:
+            self.reschedule(owners)
+        return len(website_ids)
+
+    def reschedule(self, owners):
+        """Queue checked websites ({website id: user id}) for their next check; deleted ones are left out"""
+        now = time.time()
+        retry_at = now + RETRY_SECONDS
+        try:
+            rows = db.session.query(*DUE_COLUMNS).filter(Website.id.in_(list(owners))).all()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rescheduling {len(owners)} website checks, retrying them later: {str(e)}")
+            for website_id, user_id in owners.items():
+                self.queue.schedule(website_id, user_id, retry_at)
+            return
+        for website_id, user_id, last_check, check_interval, date_added in rows:
+            due = due_timestamp(last_check, check_interval, date_added, now)
+            self.queue.schedule(website_id, user_id, max(due, retry_at))
+
+    def wake_time(self, now):
+        """When the next step should run"""
+        wake = min(self.next_sync, self.next_window)
+        next_due = self.queue.next_due()
+        if next_due is None:
+            return wake
+        if next_due > now:
+            return min(wake, next_due)
+        if self.tokens < 1 and self.capacity:
+            # Due checks are waiting for capacity
+            return min(wake, now + (1 - self.tokens) * WINDOW_SECONDS / self.capacity)
+        # Due checks are waiting for their users' quotas, or for this worker's
+        # part of the capacity, which reset with the window
+        return wake
+
+    def step(self):
+        """Sync and dispatch as needed; returns when to run again"""
+        now = time.time()
+        if now >= self.next_sync or self._reload.is_set():
+            self.sync()
+            self.next_sync = now + DUE_QUEUE_SYNC_SECONDS
+        if now >= self.next_window:
+            self.start_window()
+            self.next_window = now + WINDOW_SECONDS
+        if self.dispatch(now):
+            # Checks take a while; more may have come due since
+            return time.time()
+        return self.wake_time(now)
+
+    def run(self, stop=None):
+        """Dispatch checks until `stop` is set"""
+        stop = stop or threading.Event()
+        logger.info("Starting check dispatcher")
+        while not stop.is_set():
+            try:
+                with self.app.app_context():
+                    wake = self.step()
+            except Exception as e:
+                logger.error(f"Error dispatching website checks: {str(e)}")
+                wake = time.time() + 1
+            stop.wait(max(wake - time.time(), 0))
@@ -0,0 +1,178 @@
+import heapq
+from array import array
+
+NOT_QUEUED = -1
+
+def _grow(values, key, fill=NOT_QUEUED):
+    """Make an array indexed by id long enough for `key`, doubling to keep appends amortized O(1)"""
+    if key >= len(values):
+        values.extend(array(values.typecode, [fill]) * (max(key + 1, len(values) * 2) - len(values)))
+
+class _Heap:
+    """Binary min-heap of (due, key) in two flat arrays.
+
+    Each entry's index is written to `positions[key]`, an array shared with
+    other heaps, so an entry can be moved or removed in O(log n).
+    """
+
+    __slots__ = ('due', 'keys', 'positions')
+
+    def __init__(self, positions):
+        self.due = array('d')
+        self.keys = array('q')
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _place(self, i, due, key):
+        self.due[i] = due
+        self.keys[i] = key
+        self.positions[key] = i
+
+    def _sift_up(self, i):
+        due, key = self.due[i], self.keys[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if self.due[parent] <= due:
+                break
+            self._place(i, self.due[parent], self.keys[parent])
+            i = parent
+        self._place(i, due, key)
+
+    def _sift_down(self, i):
+        size = len(self.keys)
+        due, key = self.due[i], self.keys[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.due[child + 1] < self.due[child]:
+                child += 1
+            if self.due[child] >= due:
+                break
+            self._place(i, self.due[child], self.keys[child])
+            i = child
+        self._place(i, due, key)
+
+    def set(self, key, due):
+        """Add the entry, or move it if the key is already in this heap"""
+        _grow(self.positions, key)
+        i = self.positions[key]
+        if i == NOT_QUEUED:
+            self.due.append(due)
+            self.keys.append(key)
+            self._sift_up(len(self.keys) - 1)
+        elif due < self.due[i]:
+            self.due[i] = due
+            self._sift_up(i)
+        else:
+            self.due[i] = due
+            self._sift_down(i)
+
+    def remove(self, key):
+        i = self.positions[key]
+        self.positions[key] = NOT_QUEUED
+        last_due, last_key = self.due.pop(), self.keys.pop()
+        if i < len(self.keys):
+            self._place(i, last_due, last_key)
+            self._sift_up(i)
+            self._sift_down(self.positions[last_key])
+
+    def first(self):
+        return self.due[0] if self.keys else None
+
+    def due_by(self, now, limit=None):
+        """The entries due by `now`, earliest first, without removing them.
+
+        Walks only the part of the heap that is due, so this is
+        O(k log k) for k results rather than a scan of the whole heap.
+        """
+        found = []
+        candidates = [(self.due[0], 0)] if self.keys and self.due[0] <= now else []
+        while candidates and (limit is None or len(found) < limit):
+            due, i = heapq.heappop(candidates)
+            found.append((due, self.keys[i]))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(self.keys) and self.due[child] <= now:
+                    heapq.heappush(candidates, (self.due[child], child))
+        return found
+
+    def nbytes(self):
+        return self.due.buffer_info()[1] * self.due.itemsize + self.keys.buffer_info()[1] * self.keys.itemsize
+
+class DueQueue:
+    """Next due time of every website, as one min-heap per user.
+
+    Due times are POSIX timestamps. A second heap orders the users by
+    their earliest due website, so finding what is due is cheap even
+    with many idle users. Adding, moving and removing a website are
+    O(log n); an entry takes a float and an id in its user's heap plus
+    two 4-byte slots in arrays indexed by website id.
+    """
+
+    def __init__(self):
+        self.site_users = array('i')      # website id -> user id of the heap holding it
+        self.site_positions = array('i')  # website id -> index in that heap, or NOT_QUEUED
+        self.user_positions = array('i')  # user id -> index in self.users, or NOT_QUEUED
+        self.heaps = {}                   # user id -> _Heap of (due, website id)
+        self.users = _Heap(self.user_positions)  # (earliest due, user id)
+
+    def __len__(self):
+        return sum(len(heap) for heap in self.heaps.values())
+
+    def __contains__(self, website_id):
+        return website_id < len(self.site_positions) and self.site_positions[website_id] != NOT_QUEUED
+
+    def _refresh_user(self, user_id):
+        heap = self.heaps.get(user_id)
+        if heap:
+            self.users.set(user_id, heap.first())
+        else:
+            self.heaps.pop(user_id, None)
+            if user_id < len(self.user_positions) and self.user_positions[user_id] != NOT_QUEUED:
+                self.users.remove(user_id)
+
+    def schedule(self, website_id, user_id, due):
+        """Queue a website, or move it to a new due time or user"""
+        if website_id in self and self.site_users[website_id] != user_id:
+            self.remove(website_id)
+        _grow(self.site_users, website_id, 0)
+        self.site_users[website_id] = user_id
+        heap = self.heaps.get(user_id)
+        if heap is None:
+            heap = self.heaps[user_id] = _Heap(self.site_positions)
+        heap.set(website_id, due)
+        self._refresh_user(user_id)
+
+    def remove(self, website_id):
+        if website_id not in self:
+            return
+        user_id = self.site_users[website_id]
+        self.heaps[user_id].remove(website_id)
+        self._refresh_user(user_id)
+
+    def clear(self):
+        self.__init__()
+
+    def next_due(self):
+        """Earliest due time in the queue, or None when it is empty"""
+        return self.users.first()
+
+    def due_users(self, now):
+        """Users with websites due by `now`, most overdue first"""
+        return [user_id for _, user_id in self.users.due_by(now)]
+
+    def due(self, user_id, now, limit=None):
+        """A user's (due, website id) entries due by `now`, most overdue first"""
+        heap = self.heaps.get(user_id)
+        return heap.due_by(now, limit) if heap else []
+
+    def nbytes(self):
+        """Memory held by the queue's arrays"""
+        arrays = (self.site_users, self.site_positions, self.user_positions)
+        return (
+            sum(a.buffer_info()[1] * a.itemsize for a in arrays)
+            + self.users.nbytes()
+            + sum(heap.nbytes() for heap in self.heaps.values())
+        )
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+# Rows fetched per database round trip and written per response chunk
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+WEBSITE_COLUMNS = [
+    'id', 'url', 'check_interval', 'is_reachable', 'last_check', 'last_change',
+    'last_visited', 'date_added', 'changed_regions', 'watch_regions', 'ignore_regions',
+]
+CHECK_RESULT_COLUMNS = [
+    'id', 'website_id', 'checked_at', 'is_reachable', 'changed', 'changed_regions', 'triggered_rules',
+]
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+def stream_export(rows, columns, fmt):
+    """Yield `rows` (dicts) as NDJSON or CSV text, one chunk per batch of rows.
+
+    The first chunk is sent right after the first row so clients see data
+    immediately; after that rows are buffered EXPORT_BATCH_SIZE at a time.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+    count = 0
+    for row in rows:
+        if writer:
+            writer.writerow([_csv_value(row.get(column)) for column in columns])
+        else:
+            buffer.write(json.dumps(row))
+            buffer.write('\n')
+        count += 1
+        if count == 1 or count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue()
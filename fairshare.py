@@ -0,0 +1,77 @@
+import os
+from collections import deque
+
+# Website checks dispatched per minute, shared by all users
+CHECK_CAPACITY = int(os.getenv('CHECK_CAPACITY', 120))
+# Most checks a single user gets per minute unless User.check_quota says otherwise
+DEFAULT_USER_QUOTA = int(os.getenv('DEFAULT_USER_QUOTA', 60))
+
+def split_share(total, parts, index):
+    """Part `index` of `total` split into `parts` whole numbers that add up to `total`"""
+    return total // parts + (1 if index % parts < total % parts else 0)
+
+class FairQueue:
+    """Deficit round-robin over per-user queues of due website checks.
+
+    Each visit adds `weight` to a user's deficit and lets the user dispatch
+    one check per whole unit, up to their per-run quota. Deficits and the
+    round-robin position carry over between runs, so a user cut off by the
+    capacity limit is served first next time.
+    """
+
+    def __init__(self):
+        self.queues = {}
+        self.weights = {}
+        self.quotas = {}
+        self.deficits = {}
+        self.order = deque()
+        self.served = {}
+
+    def enqueue(self, user_id, website_ids, weight=1.0, quota=None):
+        """Replace a user's queue with their currently due websites, most overdue first"""
+        self.queues[user_id] = deque(website_ids)
+        self.weights[user_id] = max(weight, 0.01)
+        self.quotas[user_id] = quota
+        if user_id not in self.deficits:
+            self.deficits[user_id] = 0.0
+            self.order.append(user_id)
+
+    def reset(self):
+        """Drop the queues of the last run, keeping deficits and position"""
+        self.queues.clear()
+
+    def _eligible(self, user_id):
+        quota = self.quotas[user_id]
+        return bool(self.queues[user_id]) and (quota is None or self.served.get(user_id, 0) < quota)
+
+    def dequeue(self, capacity):
+        """Pick up to `capacity` website ids, sharing them across users by weight"""
+        selected = []
+        self.served = {}
+
+        # Forget users that have nothing due
+        for user_id in list(self.order):
+            if not self.queues.get(user_id):
+                self.order.remove(user_id)
+                del self.deficits[user_id]
+                self.queues.pop(user_id, None)
+                self.weights.pop(user_id, None)
+                self.quotas.pop(user_id, None)
+
+        while len(selected) < capacity and any(self._eligible(user_id) for user_id in self.order):
+            user_id = self.order[0]
+            self.order.rotate(-1)
+            if not self._eligible(user_id):
+                continue
+
+            self.deficits[user_id] += self.weights[user_id]
+            queue = self.queues[user_id]
+            while self.deficits[user_id] >= 1 and len(selected) < capacity and self._eligible(user_id):
+                selected.append(queue.popleft())
+                self.deficits[user_id] -= 1
+                self.served[user_id] = self.served.get(user_id, 0) + 1
+
+            if not queue:
+                self.deficits[user_id] = 0.0
+
+        return selected
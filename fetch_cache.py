@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+# Seconds a fetch result is reused for the same URL, and how many are kept
+FETCH_CACHE_TTL = int(os.getenv('FETCH_CACHE_TTL', 60))
+FETCH_CACHE_SIZE = int(os.getenv('FETCH_CACHE_SIZE', 256))
+# Upper bound on the page content, text and fingerprints held by the cache
+FETCH_CACHE_MAX_BYTES = int(os.getenv('FETCH_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonical_url(url):
+    """Normalize a URL so trivially different spellings share a cache entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+class FetchResult:
+    """What a check needs from one fetch of a URL"""
+
+    def __init__(self, is_reachable, status=None, etag=None, last_modified=None, content=None):
+        self.is_reachable = is_reachable
+        self.status = status
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = content
+        # Filled in by the first check that parses the page; the parsed soup
+        # itself is not kept, as it takes many times the size of the page
+        self.text = None
+        self.fingerprint = None  # JSON
+
+    def nbytes(self):
+        return sum(len(value) for value in (self.content, self.text, self.fingerprint) if value)
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class FetchCache:
+    """LRU cache of recent fetch results with a TTL, bounded by count and bytes,
+    and single-flight fetching.
+
+    Concurrent requests for a URL that is not cached wait for the one fetch
+    already in flight instead of starting their own.
+    """
+
+    def __init__(self, ttl=FETCH_CACHE_TTL, maxsize=FETCH_CACHE_SIZE, max_bytes=FETCH_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # canonical url -> (expires_at, result)
+        self._inflight = {}            # canonical url -> _Call
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_fetch(self, url, fetch):
+        key = canonical_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fetch(url)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if call.error is None:
+                    self._entries[key] = (time.monotonic() + self.ttl, call.result)
+                    self._entries.move_to_end(key)
+                    self._evict()
+            call.event.set()
+
+    def _nbytes(self):
+        return sum(result.nbytes() for _, result in self._entries.values())
+
+    def _evict(self):
+        # Results grow once parsed, so the byte total is recounted rather than tracked
+        while len(self._entries) > self.maxsize or (len(self._entries) > 1 and self._nbytes() > self.max_bytes):
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._entries),
+                'bytes': self._nbytes(),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.coalesced) / requests if requests else 0.0,
+            }
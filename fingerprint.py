@@ -0,0 +1,225 @@
+import base64
+import hashlib
+from bs4 import BeautifulSoup, Comment, Tag
+
+# Elements that get their own node in the fingerprint tree; inline elements are
+# folded into the text of their nearest block ancestor.
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'body', 'dd', 'details', 'dialog',
+    'div', 'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'footer', 'form',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav',
+    'ol', 'p', 'pre', 'section', 'table', 'tbody', 'td', 'tfoot', 'th',
+    'thead', 'tr', 'ul',
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head'}
+
+# Nested blocks deeper than this are folded into the text of the block at this depth
+MAX_DEPTH = 64
+# Blocks without child blocks and with less text than this are folded into their parent
+MIN_REGION_TEXT = 64
+
+# A tree node is either the hash of a block without child blocks, or
+# [hash, {segment: node}] for a block with child blocks. The block's own text,
+# if any, is stored as an extra child under the empty segment.
+
+def _digest(data):
+    return base64.b64encode(hashlib.blake2b(data.encode('utf-8'), digest_size=6).digest()).decode('ascii')
+
+def _node_hash(node):
+    return node if isinstance(node, str) else node[0]
+
+def _node_children(node):
+    return {} if isinstance(node, str) else node[1]
+
+class _Block:
+    __slots__ = ('parent', 'segment', 'path', 'depth', 'texts', 'children', 'positions', 'node')
+
+    def __init__(self, parent, segment, path, depth):
+        self.parent = parent
+        self.segment = segment
+        self.path = path
+        self.depth = depth
+        self.texts = []
+        self.children = {}  # segment -> _Block
+        self.positions = {}
+        self.node = None
+
+    def add_child(self, tag):
+        self.positions[tag.name] = self.positions.get(tag.name, 0) + 1
+        segment = f"{tag.name}[{self.positions[tag.name]}]"
+        if tag.get('id') and f"{tag.name}#{tag['id']}" not in self.children:
+            segment = f"{tag.name}#{tag['id']}"
+        child = self.children[segment] = _Block(self, segment, f"{self.path} > {segment}", self.depth + 1)
+        return child
+
+    def region(self):
+        """The block whose node holds this block's content"""
+        block = self
+        while block.node is None and block.parent is not None:
+            block = block.parent
+        return block
+
+    def finish(self):
+        text = ' '.join(self.texts)
+        if not self.children:
+            if self.parent is not None and len(text) < MIN_REGION_TEXT:
+                # Too small to be worth a region of its own
+                if text:
+                    self.parent.texts.append(text)
+                del self.parent.children[self.segment]
+                return
+            self.node = _digest(text)
+            return
+        children = {'': _digest(text)} if text else {}
+        children.update((segment, child.node) for segment, child in self.children.items())
+        self.node = [_digest(''.join(f"{segment}:{_node_hash(node)}," for segment, node in children.items())), children]
+
+def build_fingerprint_tree(html):
+    """Hash tree over the block elements of a page, similar to a Merkle tree.
+
+    Returns (tree, soup, paths); `paths` maps id() of every element to
+    (path, whole) for the node holding its content, for resolving CSS
+    selectors to regions. `whole` is False when the element's block was
+    folded into that node's own text, so it covers none of the node's child
+    blocks. The page is walked without recursion, so deeply nested markup
+    can't overflow the stack.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    root = soup.body or soup
+    top = _Block(None, 'body', 'body', 0)
+    blocks = [top]
+    owners = {id(root): top}  # id() of each element -> block its content belongs to, or None if skipped
+    elements = {id(root): top}
+
+    for element in root.descendants:
+        block = owners.get(id(element.parent))
+        if block is None:
+            if isinstance(element, Tag):
+                owners[id(element)] = None
+            continue
+        if isinstance(element, Tag):
+            if element.name in SKIP_TAGS:
+                owners[id(element)] = None
+                continue
+            if element.name in BLOCK_TAGS and block.depth < MAX_DEPTH:
+                block = block.add_child(element)
+                blocks.append(block)
+            owners[id(element)] = block
+            elements[id(element)] = block
+        elif not isinstance(element, Comment):
+            text = ' '.join(element.split())
+            if text:
+                block.texts.append(text)
+
+    # Blocks were created parents first, so finishing them in reverse builds the tree bottom-up
+    for block in reversed(blocks):
+        block.finish()
+    paths = {}
+    for key, block in elements.items():
+        region = block.region()
+        paths[key] = (region.path, region is block)
+    return top.node, soup, paths
+
+def page_text(soup):
+    """Visible text of a parsed page, whitespace-normalized"""
+    texts = []
+    for string in soup.find_all(string=True):
+        if isinstance(string, Comment) or string.parent.name in SKIP_TAGS:
+            continue
+        text = ' '.join(string.split())
+        if text:
+            texts.append(text)
+    return ' '.join(texts)
+
+def diff_fingerprint_trees(old, new, path='body'):
+    """Paths of the deepest regions that differ; unchanged subtrees are skipped.
+
+    Child blocks are first paired by content, so inserting or removing a
+    block reports only that block even though the positions of its later
+    siblings shift. The remaining children are compared by segment.
+    """
+    if _node_hash(old) == _node_hash(new):
+        return []
+
+    old_children = _node_children(old)
+    new_children = _node_children(new)
+    if not old_children and not new_children:
+        return [path]
+
+    def child_path(segment):
+        return f"{path} > {segment}" if segment else path
+
+    # Pair children unchanged in place, then unchanged but moved, then edited in place
+    in_place = {segment for segment, child in new_children.items()
+                if segment in old_children and _node_hash(old_children[segment]) == _node_hash(child)}
+    used = set(in_place)  # old segments paired with a new child
+    by_hash = {}
+    for segment, child in reversed(list(old_children.items())):
+        if segment not in used:
+            by_hash.setdefault(_node_hash(child), []).append(segment)
+
+    changed = []
+    pending = []
+    for segment, child in new_children.items():
+        if segment in in_place:
+            continue
+        same = by_hash.get(_node_hash(child))
+        if same:
+            used.add(same.pop())
+        else:
+            pending.append((segment, child))
+
+    for segment, child in pending:
+        before = old_children.get(segment)
+        if before is None or segment in used:
+            changed.append(child_path(segment))
+        else:
+            used.add(segment)
+            changed.extend(diff_fingerprint_trees(before, child, child_path(segment)))
+    for segment in old_children:
+        if segment not in used:
+            changed.append(child_path(segment))
+
+    # Same children and text, but in a different order
+    if not changed:
+        changed.append(path)
+    return list(dict.fromkeys(changed))
+
+def resolve_regions(soup, paths, selectors):
+    """Map CSS selectors to the regions they match, as {path: whole}.
+
+    A region is the whole subtree at its path, or only the own text of that
+    node when the selector matched a block too small for a node of its own.
+    """
+    regions = {}
+    for selector in selectors or []:
+        try:
+            for element in soup.select(selector):
+                if id(element) in paths:
+                    path, whole = paths[id(element)]
+                    regions[path] = regions.get(path, False) or whole
+        except Exception:
+            continue
+    return regions
+
+def _inside(path, regions):
+    # A node's own text is reported under the node's path, so that path is covered either way
+    return any(path == region or (whole and path.startswith(region + ' > ')) for region, whole in regions.items())
+
+def filter_regions(changed, watch=None, ignore=None):
+    """Drop changes in ignored regions and, if any are watched, outside of them"""
+    if ignore:
+        changed = [path for path in changed if not _inside(path, ignore)]
+    if watch:
+        changed = [path for path in changed if _inside(path, watch)]
+    return changed
+
+def validate_selectors(selectors):
+    """Return the first invalid CSS selector in the list, or None"""
+    soup = BeautifulSoup('', 'html.parser')
+    for selector in selectors:
+        try:
+            soup.select(selector)
+        except Exception:
+            return selector
+    return None
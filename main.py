@@ -1,29 +1,52 @@
 import os
+import json
 import logging
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from functools import wraps
+from flask import Flask, Blueprint, Response, current_app, render_template, request, redirect, url_for, flash, jsonify, session, stream_with_context
 from flask_cors import CORS
-from models import db, User, Website
+from models import db, User, Website, WatchRule, CheckResult
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
 from flask_migrate import Migrate
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, EqualTo
 from datetime import datetime, timezone
-from sqlalchemy import text
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 from urllib.request import Request, urlopen
 from urllib.error import URLError, HTTPError
-from scheduler import init_scheduler
-from apscheduler.schedulers.background import BackgroundScheduler
-from tasks import check_website_changes, schedule_periodic_checks
+from tasks import check_website_changes, fetch_cache
+from fingerprint import validate_selectors
+from rules import validate_rule
+from fairshare import DEFAULT_USER_QUOTA
+from export import stream_export, EXPORT_BATCH_SIZE, EXPORT_FORMATS, WEBSITE_COLUMNS, CHECK_RESULT_COLUMNS
+from profiling import profiler, save_profiler_settings, collect_slow_checks, PROFILE_MODES, SLOW_CHECKS_SHOWN
 from email_validator import validate_email
-from flask_mail import Mail
+from utils.email import mail
 
 load_dotenv()
 
-app = Flask(__name__)
-CORS(app)
+# Comma-separated usernames allowed to use the /admin endpoints
+ADMIN_USERNAMES = {name.strip() for name in os.getenv('ADMIN_USERNAMES', '').split(',') if name.strip()}
+
+# Dashboard cards are loaded in pages of this size
+WEBSITES_PAGE_SIZE = 50
+MAX_WEBSITES_PAGE_SIZE = 200
+
+# Login manager is bound to the app in create_app()
+login_manager = LoginManager()
+login_manager.login_view = 'main.login'
+login_manager.login_message = 'Please log in to access this page.'
+login_manager.login_message_category = 'info'
+
+migrate = Migrate()
+
+# All views; registered on the app in create_app()
+bp = Blueprint('main', __name__)
+
+@login_manager.user_loader
+def load_user(user_id):
+    return User.query.get(int(user_id))
 
 # Add datetime filter
 def format_datetime(value):
@@ -36,87 +59,69 @@ def format_datetime(value):
             return value
     return value.strftime('%Y-%m-%d %H:%M:%S UTC')
 
-app.jinja_env.filters['format_datetime'] = format_datetime
-
-# Hard-coded SQLite database URI
-basedir = os.path.abspath(os.path.dirname(__file__))
-instance_dir = os.path.join(basedir, "instance")
-os.makedirs(instance_dir, exist_ok=True)
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(instance_dir, "site.db")}'
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback-secret-key')
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-app.logger.setLevel(logging.DEBUG)
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-# Initialize SQLAlchemy and Flask-Migrate
-db.init_app(app)
-migrate = Migrate(app, db)
-
-# Mail configuration
-app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
-app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
-app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
-app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
-app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
-app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
-
-# Initialize Flask-Mail
-mail = Mail(app)
-
-try:
-    # Test the connection
-    with app.app_context():
-        db.engine.connect()
-    app.logger.info("Database initialized successfully")
-except Exception as e:
-    app.logger.error(f"Error initializing database: {str(e)}")
-    if 'SSL' in str(e):
-        app.logger.error("SSL connection error. Please check your database SSL configuration.")
-    exit(1)
-
-# Initialize Flask-Login
-login_manager = LoginManager(app)
-login_manager.login_view = 'login'
-login_manager.login_message = 'Please log in to access this page.'
-login_manager.login_message_category = 'info'
-
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
-
-def create_tables():
-    with app.app_context():
-        try:
-            db.create_all()
-            app.logger.info("Tables created successfully")
-        except Exception as e:
-            app.logger.error(f"Error creating tables: {str(e)}")
-            exit(1)
-
-def update_schema():
-    with app.app_context():
-        try:
-            # Check if the column already exists with the correct type
-            result = db.session.execute(text("PRAGMA table_info(user)")).fetchall()
-            password_hash_column = next((col for col in result if col[1] == 'password_hash'), None)
-            
-            if password_hash_column is None or password_hash_column[2] != 'VARCHAR(255)':
-                # If the column doesn't exist or has the wrong type, recreate the table
-                db.session.execute(text('CREATE TABLE IF NOT EXISTS user_new (id INTEGER PRIMARY KEY AUTOINCREMENT, username VARCHAR(64) UNIQUE, password_hash VARCHAR(255))'))
-                db.session.execute(text('INSERT OR IGNORE INTO user_new SELECT * FROM user'))
-                db.session.execute(text('DROP TABLE IF EXISTS user'))
-                db.session.execute(text('ALTER TABLE user_new RENAME TO user'))
-                db.session.commit()
-                app.logger.info("Database schema updated successfully")
-            else:
-                app.logger.info("Database schema is up to date")
-        except Exception as e:
-            db.session.rollback()
-            app.logger.error(f"Error updating database schema: {str(e)}")
-            exit(1)
+def database_uri(basedir):
+    """DATABASE_URL, or SQLite in instance/; relative SQLite paths are taken from the project directory"""
+    url = os.getenv('DATABASE_URL')
+    if not url:
+        return f'sqlite:///{os.path.join(basedir, "instance", "site.db")}'
+    path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else None
+    if path and path != ':memory:' and not os.path.isabs(path):
+        # Flask-SQLAlchemy would otherwise resolve it inside instance/
+        return f'sqlite:///{os.path.join(basedir, path)}'
+    return url
+
+def create_app(config=None):
+    """Build and configure the Flask app; `config` overrides the settings below.
+
+    Only configuration happens here: the database is connected lazily on first
+    use, schema changes are applied by `flask db upgrade`, and the periodic
+    checks run in their own process (see scheduler.py).
+    """
+    app = Flask(__name__)
+    CORS(app)
+
+    app.jinja_env.filters['format_datetime'] = format_datetime
+
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    instance_dir = os.path.join(basedir, "instance")
+    os.makedirs(instance_dir, exist_ok=True)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri(basedir)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'fallback-secret-key')
+
+    # Set up logging
+    logging.basicConfig(level=logging.DEBUG)
+    app.logger.setLevel(logging.DEBUG)
+
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+    # Mail configuration
+    app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
+    app.config['MAIL_PORT'] = int(os.getenv('MAIL_PORT', 587))
+    app.config['MAIL_USE_TLS'] = os.getenv('MAIL_USE_TLS', 'True').lower() == 'true'
+    app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
+    app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
+    app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
+
+    if config:
+        app.config.update(config)
+
+    # Initialize extensions
+    db.init_app(app)
+    migrate.init_app(app, db)
+    mail.init_app(app)
+    login_manager.init_app(app)
+
+    app.register_blueprint(bp)
+    return app
+
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.username not in ADMIN_USERNAMES:
+            return jsonify({'error': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapped
 
 class LoginForm(FlaskForm):
     class Meta:
@@ -133,72 +138,69 @@ class RegistrationForm(FlaskForm):
     password2 = PasswordField('Repeat Password', validators=[DataRequired(), EqualTo('password')])
     submit = SubmitField('Register')
 
-@app.route('/')
+@bp.route('/')
 def index():
-    app.logger.debug(f"Index route accessed. User authenticated: {current_user.is_authenticated}")
-    app.logger.debug(f"Current user: {current_user}")
     if current_user.is_authenticated:
-        # Order by date_added descending (newest first)
-        websites = Website.query.filter_by(user_id=current_user.id).order_by(Website.date_added.desc()).all()
-        app.logger.debug(f"Found {len(websites)} websites for user {current_user.id}")
-        return render_template('index.html', websites=websites)
+        # Cards are fetched page by page from /api/websites by app.js
+        summary = Website.status_counts(current_user.id)
+        return render_template('index.html', summary=summary, page_size=WEBSITES_PAGE_SIZE)
     return render_template('landing.html')
 
-@app.route('/login', methods=['GET', 'POST'])
+@bp.route('/login', methods=['GET', 'POST'])
 def login():
     session.pop('_flashes', None)
-    app.logger.debug(f"Login route accessed. Method: {request.method}")
+    current_app.logger.debug(f"Login route accessed. Method: {request.method}")
     if current_user.is_authenticated:
-        app.logger.debug("User already authenticated, redirecting to index")
-        return redirect(url_for('index'))
+        current_app.logger.debug("User already authenticated, redirecting to index")
+        return redirect(url_for('main.index'))
     
     form = LoginForm()
-    app.logger.debug(f"Login form data: {request.form}")
-    app.logger.debug(f"Form errors: {form.errors}")
+    current_app.logger.debug(f"Login form data: {request.form}")
+    current_app.logger.debug(f"Form errors: {form.errors}")
     
     if form.validate_on_submit():
-        app.logger.debug(f"Form validated. Attempting login for username: {form.username.data}")
+        current_app.logger.debug(f"Form validated. Attempting login for username: {form.username.data}")
         try:
             user = User.query.filter_by(username=form.username.data).first()
-            app.logger.debug(f"User query result: {user}")
+            current_app.logger.debug(f"User query result: {user}")
             if user is None or not user.check_password(form.password.data):
-                app.logger.warning(f"Invalid username or password for: {form.username.data}")
+                current_app.logger.warning(f"Invalid username or password for: {form.username.data}")
                 flash('Invalid username or password', 'error')
                 return render_template('login.html', title='Sign In', form=form)
             
             login_user(user)
-            app.logger.info(f"User {form.username.data} logged in successfully")
+            current_app.logger.info(f"User {form.username.data} logged in successfully")
             flash('You have been logged in successfully!', 'success')
             next_page = request.args.get('next')
             if not next_page or urlparse(next_page).netloc != '':
-                next_page = url_for('index')
-            app.logger.debug(f"Redirecting to: {next_page}")
+                next_page = url_for('main.index')
+            current_app.logger.debug(f"Redirecting to: {next_page}")
             return redirect(next_page)
         except Exception as e:
-            app.logger.error(f"Error during login process: {str(e)}")
+            current_app.logger.error(f"Error during login process: {str(e)}")
             flash('An error occurred during login. Please try again.', 'error')
             return render_template('login.html', title='Sign In', form=form)
     
     return render_template('login.html', title='Sign In', form=form)
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     session.pop('_flashes', None)
     logout_user()
     flash('You have been logged out successfully!', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.route('/register', methods=['GET', 'POST'])
+@bp.route('/register', methods=['GET', 'POST'])
 def register():
-    app.logger.info(f"Register route accessed. Method: {request.method}, Data: {request.form}")
+    current_app.logger.info(f"Register route accessed. Method: {request.method}, Data: {request.form}")
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     form = RegistrationForm()
     if form.validate_on_submit():
-        app.logger.info(f"Form validated. Attempting to register user: {form.username.data}")
+        current_app.logger.info(f"Form validated. Attempting to register user: {form.username.data}")
         existing_user = User.query.filter_by(username=form.username.data).first()
         if existing_user:
-            app.logger.warning(f"Username {form.username.data} already exists")
+            current_app.logger.warning(f"Username {form.username.data} already exists")
             flash('Username already exists. Please choose a different username.', 'error')
             return render_template('register.html', title='Register', form=form)
         try:
@@ -206,25 +208,45 @@ def register():
             user.set_password(form.password.data)
             db.session.add(user)
             db.session.commit()
-            app.logger.info(f"User {form.username.data} registered successfully")
+            current_app.logger.info(f"User {form.username.data} registered successfully")
             flash('Congratulations, you are now a registered user!', 'success')
-            return redirect(url_for('login'))
+            return redirect(url_for('main.login'))
         except Exception as e:
             db.session.rollback()
-            app.logger.error(f"Error registering user: {str(e)}")
+            current_app.logger.error(f"Error registering user: {str(e)}")
             flash('An error occurred during registration. Please try again.', 'error')
     else:
-        app.logger.warning(f"Form validation failed: {form.errors}")
+        current_app.logger.warning(f"Form validation failed: {form.errors}")
         for field, errors in form.errors.items():
             for error in errors:
                 flash(f"{field.capitalize()}: {error}", 'error')
     return render_template('register.html', title='Register', form=form)
 
-@app.route('/api/websites', methods=['GET'])
+@bp.route('/api/websites', methods=['GET'])
 @login_required
 def get_websites():
-    websites = Website.query.filter_by(user_id=current_user.id).all()
-    return jsonify([website.to_dict() for website in websites])
+    # Newest first; id breaks ties so pages stay stable
+    query = Website.query.filter_by(user_id=current_user.id) \
+        .order_by(Website.date_added.desc(), Website.id.desc())
+
+    ids = request.args.get('ids')
+    if ids:
+        try:
+            id_list = [int(i) for i in ids.split(',') if i]
+        except ValueError:
+            return jsonify({'error': 'Invalid ids parameter'}), 400
+        query = query.filter(Website.id.in_(id_list[:MAX_WEBSITES_PAGE_SIZE]))
+    elif 'limit' in request.args or 'offset' in request.args:
+        limit = min(request.args.get('limit', WEBSITES_PAGE_SIZE, type=int), MAX_WEBSITES_PAGE_SIZE)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        query = query.offset(offset).limit(max(limit, 1))
+
+    return jsonify([website.to_dict() for website in query])
+
+@bp.route('/api/websites/summary', methods=['GET'])
+@login_required
+def get_websites_summary():
+    return jsonify(Website.status_counts(current_user.id))
 
 def check_website_reachability(url, timeout=5):
     try:
@@ -245,10 +267,10 @@ def check_website_reachability(url, timeout=5):
                 return True, he
             raise  # re-raise other HTTP errors
     except Exception as e:
-        app.logger.error(f"Error checking {url}: {str(e)}")
+        current_app.logger.error(f"Error checking {url}: {str(e)}")
         return False, None
 
-@app.route('/api/websites', methods=['POST'])
+@bp.route('/api/websites', methods=['POST'])
 @login_required
 def add_website():
     data = request.json
@@ -287,7 +309,7 @@ def add_website():
 
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error adding website {url}: {str(e)}")
+        current_app.logger.error(f"Error adding website {url}: {str(e)}")
         return jsonify({
             'error': 'Failed to add website',
             'message': str(e),
@@ -298,7 +320,7 @@ def add_website():
             }
         }), 500
 
-@app.route('/api/websites/<int:id>', methods=['DELETE'])
+@bp.route('/api/websites/<int:id>', methods=['DELETE'])
 @login_required
 def remove_website(id):
     website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
@@ -306,7 +328,7 @@ def remove_website(id):
     db.session.commit()
     return '', 204
 
-@app.route('/api/websites/<int:id>/interval', methods=['PATCH'])
+@bp.route('/api/websites/<int:id>/interval', methods=['PATCH'])
 @login_required
 def update_interval(id):
     website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
@@ -326,16 +348,81 @@ def update_interval(id):
     
     return jsonify(website.to_dict())
 
-@app.route('/api/websites/<int:id>/visit', methods=['POST'])
+@bp.route('/api/websites/<int:id>/regions', methods=['PATCH'])
+@login_required
+def update_regions(id):
+    website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    data = request.get_json()
+    
+    for key in ('watch', 'ignore'):
+        if key not in data:
+            continue
+        selectors = data[key]
+        if not isinstance(selectors, list) or not all(isinstance(s, str) and s.strip() for s in selectors):
+            return jsonify({'error': f'Invalid {key} parameter. Must be a list of CSS selectors'}), 400
+        selectors = [s.strip() for s in selectors]
+        invalid = validate_selectors(selectors)
+        if invalid:
+            return jsonify({'error': f'Invalid CSS selector: {invalid}'}), 400
+        setattr(website, f'{key}_regions', json.dumps(selectors) if selectors else None)
+    
+    db.session.commit()
+    
+    return jsonify(website.to_dict())
+
+@bp.route('/api/websites/<int:id>/rules', methods=['GET'])
+@login_required
+def get_rules(id):
+    website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    return jsonify([rule.to_dict() for rule in website.rules])
+
+@bp.route('/api/websites/<int:id>/rules', methods=['POST'])
+@login_required
+def add_rule(id):
+    website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    data = request.get_json()
+    
+    kind = data.get('kind')
+    pattern = data.get('pattern')
+    operator = data.get('operator')
+    threshold = data.get('threshold')
+    
+    error = validate_rule(kind, pattern, operator, threshold)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    rule = WatchRule(
+        website_id=website.id,
+        kind=kind,
+        pattern=pattern.strip(),
+        operator=operator if kind == 'number' else None,
+        threshold=threshold if kind == 'number' else None
+    )
+    db.session.add(rule)
+    db.session.commit()
+    
+    return jsonify(rule.to_dict()), 201
+
+@bp.route('/api/websites/<int:id>/rules/<int:rule_id>', methods=['DELETE'])
+@login_required
+def remove_rule(id, rule_id):
+    website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    rule = WatchRule.query.filter_by(id=rule_id, website_id=website.id).first_or_404()
+    db.session.delete(rule)
+    db.session.commit()
+    return '', 204
+
+@bp.route('/api/websites/<int:id>/visit', methods=['POST'])
 @login_required
 def update_last_visited(id):
     website = Website.query.filter_by(id=id, user_id=current_user.id).first_or_404()
     website.last_visited = datetime.now(timezone.utc)
     website.last_change = None  # Reset change detection when visiting
+    website.changed_regions = None
     db.session.commit()
     return jsonify(website.to_dict())
 
-@app.route('/api/websites/bulk', methods=['POST'])
+@bp.route('/api/websites/bulk', methods=['POST'])
 @login_required
 def bulk_add_websites():
     data = request.json
@@ -399,7 +486,7 @@ def bulk_add_websites():
                 website_ids = [w.id for w in websites_to_add]
                 check_website_changes(website_ids)
             except Exception as e:
-                app.logger.error(f"Error scheduling checks: {str(e)}")
+                current_app.logger.error(f"Error scheduling checks: {str(e)}")
         
         return jsonify({
             'added': len(results['successful']),
@@ -410,13 +497,13 @@ def bulk_add_websites():
                 
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error in bulk add: {str(e)}")
+        current_app.logger.error(f"Error in bulk add: {str(e)}")
         return jsonify({
             'error': 'Failed to add websites',
             'message': str(e)
         }), 500
 
-@app.route('/api/user/notifications', methods=['POST'])
+@bp.route('/api/user/notifications', methods=['POST'])
 @login_required
 def update_notification_settings():
     data = request.json
@@ -435,7 +522,55 @@ def update_notification_settings():
     
     return jsonify({'message': 'Notification settings updated successfully'})
 
-@app.route('/debug/websites')
+@bp.route('/api/user/lag', methods=['GET'])
+@login_required
+def get_check_lag():
+    """How far behind schedule the current user's checks are"""
+    return jsonify({
+        **Website.check_lag(current_user.id, datetime.now(timezone.utc)),
+        'check_quota': current_user.check_quota if current_user.check_quota is not None else DEFAULT_USER_QUOTA,
+        'check_weight': current_user.check_weight,
+    })
+
+def export_response(query, columns, name):
+    """Stream a query as an NDJSON or CSV download without loading it into memory"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Invalid format. Must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    
+    rows = (item.to_dict() for item in query.yield_per(EXPORT_BATCH_SIZE))
+    return Response(
+        stream_with_context(stream_export(rows, columns, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={name}.{fmt}'}
+    )
+
+def user_check_results():
+    query = CheckResult.query.join(Website).filter(Website.user_id == current_user.id)
+    website_id = request.args.get('website_id', type=int)
+    if website_id is not None:
+        query = query.filter(CheckResult.website_id == website_id)
+    return query
+
+@bp.route('/api/export/websites', methods=['GET'])
+@login_required
+def export_websites():
+    query = Website.query.filter_by(user_id=current_user.id).order_by(Website.id)
+    return export_response(query, WEBSITE_COLUMNS, 'websites')
+
+@bp.route('/api/export/checks', methods=['GET'])
+@login_required
+def export_checks():
+    query = user_check_results().order_by(CheckResult.id)
+    return export_response(query, CHECK_RESULT_COLUMNS, 'checks')
+
+@bp.route('/api/export/changes', methods=['GET'])
+@login_required
+def export_changes():
+    query = user_check_results().filter(CheckResult.changed.is_(True)).order_by(CheckResult.id)
+    return export_response(query, CHECK_RESULT_COLUMNS, 'changes')
+
+@bp.route('/debug/websites')
 @login_required
 def debug_websites():
     websites = Website.query.filter_by(user_id=current_user.id).all()
@@ -447,29 +582,61 @@ def debug_websites():
         'user_id': w.user_id
     } for w in websites])
 
-@app.route('/api/websites/all', methods=['DELETE'])
+@bp.route('/debug/fetch-cache')
+@login_required
+def debug_fetch_cache():
+    return jsonify(fetch_cache.stats())
+
+@bp.route('/admin/profiling', methods=['GET'])
+@admin_required
+def get_profiling():
+    return jsonify(profiler.settings())
+
+@bp.route('/admin/profiling', methods=['POST'])
+@admin_required
+def update_profiling():
+    data = request.get_json()
+    enabled = data.get('enabled', False)
+    sample_rate = data.get('sample_rate', profiler.sample_rate)
+    mode = data.get('mode', profiler.mode)
+    
+    if not isinstance(enabled, bool):
+        return jsonify({'error': 'Invalid enabled parameter. Must be true or false'}), 400
+    if not isinstance(sample_rate, (int, float)) or isinstance(sample_rate, bool) or not 0 < sample_rate <= 1:
+        return jsonify({'error': 'Invalid sample_rate. Must be between 0 and 1'}), 400
+    if mode not in PROFILE_MODES:
+        return jsonify({'error': f"Invalid mode. Must be one of: {', '.join(PROFILE_MODES)}"}), 400
+    
+    # The scheduler processes pick this up within a minute
+    save_profiler_settings(enabled, sample_rate, mode)
+    return jsonify(profiler.settings())
+
+@bp.route('/admin/slow-checks', methods=['GET'])
+@admin_required
+def get_slow_checks():
+    limit = min(request.args.get('limit', SLOW_CHECKS_SHOWN, type=int), 100)
+    return jsonify(collect_slow_checks(max(limit, 1)))
+
+@bp.route('/api/websites/all', methods=['DELETE'])
 @login_required
 def remove_all_websites():
     try:
-        # Delete all websites for the current user
+        # Delete all websites for the current user, with their watch rules and history
+        website_ids = db.session.query(Website.id).filter_by(user_id=current_user.id)
+        WatchRule.query.filter(WatchRule.website_id.in_(website_ids.scalar_subquery())).delete(synchronize_session=False)
+        CheckResult.query.filter(CheckResult.website_id.in_(website_ids.scalar_subquery())).delete(synchronize_session=False)
         Website.query.filter_by(user_id=current_user.id).delete()
         db.session.commit()
         return '', 204
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error removing all websites: {str(e)}")
+        current_app.logger.error(f"Error removing all websites: {str(e)}")
         return jsonify({
             'error': 'Failed to remove all websites',
             'message': str(e)
         }), 500
 
-# Initialize tables and schema
-with app.app_context():
-    create_tables()
-    update_schema()
-    
-# Initialize scheduler
-scheduler = init_scheduler(app)
+app = create_app()
 
 if __name__ == '__main__':
     app.logger.info("Starting Flask application on port 5001")
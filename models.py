@@ -1,16 +1,28 @@
+import json
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import case, extract, func, or_
 
 db = SQLAlchemy()
 
+def utc_isoformat(value):
+    """ISO 8601 timestamp in UTC ending in Z; naive datetimes are stored in UTC"""
+    if value is None:
+        return None
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat() + 'Z'
+
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), index=True, unique=True)
     password_hash = db.Column(db.String(255))
     notification_email = db.Column(db.String(120), nullable=True)
     notifications_enabled = db.Column(db.Boolean, default=False, nullable=False)
+    check_quota = db.Column(db.Integer, nullable=True)  # Max checks per minute; NULL uses the default
+    check_weight = db.Column(db.Float, default=1.0, nullable=False)  # Share of the check capacity
     websites = db.relationship('Website', backref='user', lazy='dynamic')
 
     def set_password(self, password):
@@ -26,10 +38,18 @@ class Website(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     is_reachable = db.Column(db.Boolean, default=True)
     last_check = db.Column(db.DateTime)  # When we last checked the site
-    last_content = db.Column(db.Text)    # Content from last check
+    last_content = db.Column(db.Text)    # Content from last check (no longer written, see fingerprint)
+    fingerprint = db.Column(db.Text)     # JSON hash tree of the page's block elements
+    changed_regions = db.Column(db.Text) # JSON list of region paths in the last change
+    watch_regions = db.Column(db.Text)   # JSON list of CSS selectors; only these count as changes
+    ignore_regions = db.Column(db.Text)  # JSON list of CSS selectors to ignore
     last_change = db.Column(db.DateTime)  # When content last changed
     last_visited = db.Column(db.DateTime) # When user last visited
     date_added = db.Column(db.DateTime)   # When site was added
+    updated_at = db.Column(db.DateTime, index=True,  # When the row last changed; read by the scheduler's due queue
+                           default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    rules = db.relationship('WatchRule', backref='website', lazy='dynamic', cascade='all, delete-orphan')
+    check_results = db.relationship('CheckResult', backref='website', lazy='dynamic', cascade='all, delete-orphan')
 
     @property
     def last_check_utc(self):
@@ -59,18 +79,33 @@ class Website(db.Model):
             return None
         return self.date_added if self.date_added.tzinfo else self.date_added.replace(tzinfo=timezone.utc)
 
+    @property
+    def due_at_utc(self):
+        """When the next check is due; never-checked sites are due since they were added"""
+        if self.last_check_utc is None:
+            return self.date_added_utc
+        return self.last_check_utc + timedelta(hours=self.check_interval)
+
     def to_dict(self):
         return {
             'id': self.id,
             'url': self.url,
-            'last_check': self.last_check_utc.isoformat() + 'Z' if self.last_check_utc else None,
-            'last_change': self.last_change_utc.isoformat() + 'Z' if self.last_change_utc else None,
-            'last_visited': self.last_visited_utc.isoformat() + 'Z' if self.last_visited_utc else None,
+            'last_check': utc_isoformat(self.last_check),
+            'last_change': utc_isoformat(self.last_change),
+            'last_visited': utc_isoformat(self.last_visited),
             'check_interval': self.check_interval,
             'is_reachable': self.is_reachable,
-            'date_added': self.date_added_utc.isoformat() + 'Z' if self.date_added_utc else None,
+            'date_added': utc_isoformat(self.date_added),
+            'changed_regions': self.load_json(self.changed_regions),
+            'watch_regions': self.load_json(self.watch_regions),
+            'ignore_regions': self.load_json(self.ignore_regions),
         }
 
+    @staticmethod
+    def load_json(value):
+        """Decode a JSON list column, treating NULL as empty"""
+        return json.loads(value) if value else []
+
     @staticmethod
     def create(url, interval, user_id, current_time=None):
         """Centralized website creation logic"""
@@ -89,3 +124,108 @@ class Website(db.Model):
             date_added=current_time
         )
         return website
+
+    @staticmethod
+    def status_counts(user_id):
+        """Count a user's websites per dashboard status in a single GROUP BY"""
+        status = case(
+            (Website.is_reachable.is_(False), 'unreachable'),
+            (Website.last_change.isnot(None), 'changed'),
+            else_='unchanged'
+        ).label('status')
+        rows = db.session.query(status, func.count(Website.id)) \
+            .filter(Website.user_id == user_id) \
+            .group_by(status) \
+            .all()
+
+        counts = {'changed': 0, 'unreachable': 0, 'unchanged': 0}
+        counts.update(dict(rows))
+        counts['total'] = sum(counts.values())
+        return counts
+
+    @staticmethod
+    def check_lag(user_id, now):
+        """How far behind schedule a user's checks are, in a single aggregate query"""
+        now = now.timestamp()
+        # Same rule as due_at_utc, in seconds since the epoch
+        due = case(
+            (Website.last_check.isnot(None), extract('epoch', Website.last_check) + Website.check_interval * 3600),
+            else_=extract('epoch', Website.date_added)
+        )
+        overdue = or_(due.is_(None), due <= now)
+        lag = case((overdue, func.coalesce(now - due, 0.0)))
+        total, due_count, max_lag, mean_lag = db.session.query(
+            func.count(Website.id),
+            func.count(lag),
+            func.max(lag),
+            func.avg(lag)
+        ).filter(Website.user_id == user_id).one()
+        return {
+            'websites': total,
+            'due': due_count,
+            'max_lag_seconds': float(max_lag or 0.0),
+            'mean_lag_seconds': float(mean_lag or 0.0),
+        }
+
+class WatchRule(db.Model):
+    """Keyword, regex or number condition that triggers a change when it becomes true"""
+    id = db.Column(db.Integer, primary_key=True)
+    website_id = db.Column(db.Integer, db.ForeignKey('website.id', ondelete='CASCADE'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False)  # contains, not_contains, regex, number
+    pattern = db.Column(db.String(500), nullable=False)
+    operator = db.Column(db.String(2))   # number rules only: <, <=, >, >=, ==
+    threshold = db.Column(db.Float)      # number rules only
+    is_met = db.Column(db.Boolean, nullable=True)  # Result of the last check; NULL until the first one
+    last_value = db.Column(db.Float)     # Number extracted on the last check
+    last_triggered = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'website_id': self.website_id,
+            'kind': self.kind,
+            'pattern': self.pattern,
+            'operator': self.operator,
+            'threshold': self.threshold,
+            'is_met': self.is_met,
+            'last_value': self.last_value,
+            'last_triggered': utc_isoformat(self.last_triggered),
+        }
+
+class CheckResult(db.Model):
+    """Outcome of a single check; rows with changed=True form the change history"""
+    id = db.Column(db.Integer, primary_key=True)
+    website_id = db.Column(db.Integer, db.ForeignKey('website.id', ondelete='CASCADE'), nullable=False)
+    checked_at = db.Column(db.DateTime, nullable=False, index=True)
+    is_reachable = db.Column(db.Boolean, nullable=False)
+    changed = db.Column(db.Boolean, default=False, nullable=False)
+    changed_regions = db.Column(db.Text)  # JSON list of region paths
+    triggered_rules = db.Column(db.Text)  # JSON list of watch rule ids
+
+    __table_args__ = (
+        db.Index('ix_check_result_website_checked', 'website_id', 'checked_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'website_id': self.website_id,
+            'checked_at': utc_isoformat(self.checked_at),
+            'is_reachable': self.is_reachable,
+            'changed': self.changed,
+            'changed_regions': Website.load_json(self.changed_regions),
+            'triggered_rules': Website.load_json(self.triggered_rules),
+        }
+
+class CheckWorker(db.Model):
+    """Heartbeat row of a check worker process; live rows form the hash ring"""
+    id = db.Column(db.String(128), primary_key=True)  # worker id, e.g. host-pid
+    hostname = db.Column(db.String(255))
+    started_at = db.Column(db.DateTime)
+    last_heartbeat = db.Column(db.DateTime, index=True)
+
+class Setting(db.Model):
+    """Small key/value store for runtime settings shared between processes"""
+    key = db.Column(db.String(128), primary_key=True)
+    value = db.Column(db.Text)  # JSON
+    updated_at = db.Column(db.DateTime)
\ No newline at end of file
@@ -0,0 +1,203 @@
+import cProfile
+import heapq
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from models import db, Setting, utc_isoformat
+
+logger = logging.getLogger(__name__)
+
+# Recent checks kept in memory, and how many of the slowest are reported
+SLOW_CHECK_LOG_SIZE = int(os.getenv('SLOW_CHECK_LOG_SIZE', 1000))
+SLOW_CHECKS_SHOWN = 20
+PROFILE_MODES = ('cprofile', 'pyinstrument')
+
+PROFILING_SETTING = 'profiling'
+SLOW_CHECKS_SETTING_PREFIX = 'slow_checks:'
+PROCESS_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+_local = threading.local()
+
+# Callables run with every finished CheckTrace; add your own with register_hook()
+hooks = []
+
+def register_hook(hook):
+    hooks.append(hook)
+
+def unregister_hook(hook):
+    hooks.remove(hook)
+
+class CheckTrace:
+    """Timings of one website check, split into named phases"""
+
+    def __init__(self, website_id, url):
+        self.website_id = website_id
+        self.url = url
+        self.started_at = datetime.now(timezone.utc)
+        self.duration = 0.0
+        self.phases = {}
+        self.profile = None
+
+    def to_dict(self):
+        return {
+            'website_id': self.website_id,
+            'url': self.url,
+            'started_at': utc_isoformat(self.started_at),
+            'duration_ms': round(self.duration * 1000, 2),
+            'phases_ms': {name: round(seconds * 1000, 2) for name, seconds in self.phases.items()},
+            'profile': self.profile,
+        }
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current check's `name` phase"""
+    trace = getattr(_local, 'trace', None)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.phases[name] = trace.phases.get(name, 0.0) + time.perf_counter() - start
+
+class SamplingProfiler:
+    """Profiles a random sample of checks when enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = 0.01
+        self.mode = 'cprofile'
+
+    def configure(self, enabled=False, sample_rate=0.01, mode='cprofile'):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.mode = mode
+
+    def settings(self):
+        return {'enabled': self.enabled, 'sample_rate': self.sample_rate, 'mode': self.mode}
+
+    def should_sample(self):
+        return self.enabled and random.random() < self.sample_rate
+
+    @contextmanager
+    def profile(self, trace):
+        if self.mode == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("pyinstrument is not installed, falling back to cProfile")
+            else:
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    trace.profile = profiler.output_text()
+                return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another thread is already profiling; skip this sample
+            yield
+            return
+        try:
+            yield
+        finally:
+            profiler.disable()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+            trace.profile = output.getvalue()
+
+profiler = SamplingProfiler()
+
+@contextmanager
+def trace_check(website_id, url):
+    """Trace one website check; spans opened inside are recorded on it"""
+    trace = CheckTrace(website_id, url)
+    _local.trace = trace
+    start = time.perf_counter()
+    try:
+        if profiler.should_sample():
+            with profiler.profile(trace):
+                yield trace
+        else:
+            yield trace
+    finally:
+        trace.duration = time.perf_counter() - start
+        _local.trace = None
+        for hook in list(hooks):
+            try:
+                hook(trace)
+            except Exception as e:
+                logger.error(f"Error in check trace hook {hook}: {str(e)}")
+
+class SlowCheckLog:
+    """Ring buffer of recent check traces that reports the slowest ones"""
+
+    def __init__(self, size=SLOW_CHECK_LOG_SIZE):
+        self._recent = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __call__(self, trace):
+        with self._lock:
+            self._recent.append(trace)
+
+    def slowest(self, n=SLOW_CHECKS_SHOWN):
+        with self._lock:
+            recent = list(self._recent)
+        return heapq.nlargest(n, recent, key=lambda trace: trace.duration)
+
+slow_checks = SlowCheckLog()
+register_hook(slow_checks)
+
+# Settings and slow-check snapshots go through the database, so the admin
+# endpoints in the web process see and control the scheduler processes.
+
+def save_profiler_settings(enabled, sample_rate, mode):
+    setting = Setting.query.get(PROFILING_SETTING) or Setting(key=PROFILING_SETTING)
+    setting.value = json.dumps({'enabled': enabled, 'sample_rate': sample_rate, 'mode': mode})
+    db.session.add(setting)
+    db.session.commit()
+    profiler.configure(enabled, sample_rate, mode)
+
+def load_profiler_settings():
+    setting = Setting.query.get(PROFILING_SETTING)
+    if setting and setting.value:
+        profiler.configure(**json.loads(setting.value))
+
+def publish_slow_checks():
+    """Store this process's slowest recent checks and drop snapshots of dead processes"""
+    now = datetime.now(timezone.utc)
+    key = SLOW_CHECKS_SETTING_PREFIX + PROCESS_ID
+    setting = Setting.query.get(key) or Setting(key=key)
+    setting.value = json.dumps([trace.to_dict() for trace in slow_checks.slowest()])
+    setting.updated_at = now
+    db.session.add(setting)
+    Setting.query.filter(
+        Setting.key.startswith(SLOW_CHECKS_SETTING_PREFIX),
+        Setting.updated_at < now - timedelta(days=1)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+def collect_slow_checks(n=SLOW_CHECKS_SHOWN):
+    """Slowest recent checks across this process and the published snapshots"""
+    checks = [dict(trace.to_dict(), process=PROCESS_ID) for trace in slow_checks.slowest(n)]
+    snapshots = Setting.query.filter(
+        Setting.key.startswith(SLOW_CHECKS_SETTING_PREFIX),
+        Setting.key != SLOW_CHECKS_SETTING_PREFIX + PROCESS_ID
+    )
+    for setting in snapshots:
+        process = setting.key[len(SLOW_CHECKS_SETTING_PREFIX):]
+        checks.extend(dict(check, process=process) for check in json.loads(setting.value or '[]'))
+    return heapq.nlargest(n, checks, key=lambda check: check['duration_ms'])
@@ -0,0 +1,135 @@
+import logging
+import operator
+import os
+import re
+from functools import lru_cache
+
+import regex
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+RULE_KINDS = ('contains', 'not_contains', 'regex', 'number')
+NUMBER_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+}
+
+# Regex and number rules see at most this much of the page text, and give up
+# after this many seconds, so a pathological pattern can't stall the checks
+MAX_RULE_TEXT = int(os.getenv('MAX_RULE_TEXT', 200000))
+RULE_TIMEOUT = float(os.getenv('RULE_TIMEOUT', 0.1))
+
+def rule_signature(rules):
+    """Hashable description of a site's rules, used as the matcher cache key"""
+    return tuple(
+        (rule.id, rule.kind, rule.pattern, rule.operator, rule.threshold)
+        for rule in sorted(rules, key=lambda rule: rule.id)
+    )
+
+def validate_rule(kind, pattern, op=None, threshold=None):
+    """Return an error message for an invalid rule definition, or None"""
+    if kind not in RULE_KINDS:
+        return f"Invalid kind. Must be one of: {', '.join(RULE_KINDS)}"
+    if not isinstance(pattern, str) or not pattern.strip():
+        return 'Missing pattern parameter'
+    if kind in ('regex', 'number'):
+        try:
+            compiled = regex.compile(pattern, regex.IGNORECASE)
+        except regex.error as e:
+            return f"Invalid regular expression: {str(e)}"
+        if kind == 'number':
+            if compiled.groups > 1:
+                return 'Number patterns may contain at most one capture group'
+            if op not in NUMBER_OPERATORS:
+                return f"Invalid operator. Must be one of: {', '.join(NUMBER_OPERATORS)}"
+            if not isinstance(threshold, (int, float)) or isinstance(threshold, bool):
+                return 'Invalid threshold. Must be a number'
+    return None
+
+def parse_number(text):
+    """Parse a price-like string such as '1,299.00', '1.299,00' or '$ 12'"""
+    text = re.sub(r'[^\d.,-]', '', text).strip('.,')
+    if ',' in text and '.' in text:
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        # A single group of three digits after the comma is a thousands separator
+        head, _, tail = text.rpartition(',')
+        text = head.replace(',', '') + ('' if len(tail) == 3 else '.') + tail
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+class RuleMatcher:
+    """All of a site's rules compiled for evaluation against the page text.
+
+    Literal rules are matched with an Aho-Corasick automaton when
+    pyahocorasick is installed, which costs one pass over the text however
+    many literals there are. Without it each literal is looked up with `in`.
+    Regex and number rules are compiled once and reused across checks, and
+    run with a timeout on the first MAX_RULE_TEXT characters of the text.
+    """
+
+    def __init__(self, signature):
+        self.literals = {}   # lowercased literal -> [(rule_id, kind)]
+        self.patterns = []   # (rule_id, kind, compiled, op, threshold)
+        for rule_id, kind, pattern, op, threshold in signature:
+            if kind in ('contains', 'not_contains'):
+                self.literals.setdefault(pattern.lower(), []).append((rule_id, kind))
+            else:
+                self.patterns.append((rule_id, kind, regex.compile(pattern, regex.IGNORECASE), op, threshold))
+
+        self.automaton = None
+        if self.literals and ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for literal in self.literals:
+                self.automaton.add_word(literal, literal)
+            self.automaton.make_automaton()
+
+    def _found_literals(self, text):
+        if self.automaton is not None:
+            return {literal for _, literal in self.automaton.iter(text)}
+        return {literal for literal in self.literals if literal in text}
+
+    def evaluate(self, text):
+        """Map rule id to (is_met, extracted value) for the given page text; rules that time out are left out"""
+        results = {}
+
+        if self.literals:
+            found = self._found_literals(text.lower())
+            for literal, rules in self.literals.items():
+                for rule_id, kind in rules:
+                    present = literal in found
+                    results[rule_id] = (present if kind == 'contains' else not present, None)
+
+        for rule_id, kind, compiled, op, threshold in self.patterns:
+            try:
+                match = compiled.search(text, 0, MAX_RULE_TEXT, timeout=RULE_TIMEOUT)
+            except TimeoutError:
+                logger.warning(f"Watch rule {rule_id} timed out after {RULE_TIMEOUT}s")
+                continue
+            if kind == 'regex':
+                results[rule_id] = (match is not None, None)
+                continue
+            value = None
+            if match:
+                value = parse_number(match.group(1) if compiled.groups else match.group(0))
+            is_met = value is not None and NUMBER_OPERATORS[op](value, threshold)
+            results[rule_id] = (is_met, value)
+
+        return results
+
+@lru_cache(maxsize=1024)
+def compile_rules(signature):
+    return RuleMatcher(signature)
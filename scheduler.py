@@ -1,14 +1,79 @@
-from apscheduler.schedulers.background import BackgroundScheduler
-from tasks import schedule_periodic_checks
+import signal
+import sys
+import threading
+from apscheduler.schedulers.blocking import BlockingScheduler
+from dispatcher import CheckDispatcher
+from tasks import prune_check_results
 
-def init_scheduler(app):
-    scheduler = BackgroundScheduler()
+def _add_jobs(scheduler, app, owns=None, shard=None):
+    # Checks are dispatched at their due times by a thread of their own
+    dispatcher = CheckDispatcher(app, owns, shard)
+    threading.Thread(target=dispatcher.run, name='check-dispatcher', daemon=True).start()
     scheduler.add_job(
-        func=lambda: schedule_periodic_checks(app),
+        func=dispatcher.reload,
         trigger='interval',
-        minutes=1,  # Check every minute for websites that need updating
-        id='website_scheduler',
-        name='Schedule website checks'
+        hours=24,  # Drops deleted websites and anything a sync missed
+        id='reload_due_queue',
+        name='Reload due queue'
     )
-    scheduler.start()
-    return scheduler
+    scheduler.add_job(
+        func=lambda: prune_check_results(app),
+        trigger='interval',
+        hours=24,
+        id='prune_check_results',
+        name='Prune old check results'
+    )
+    return dispatcher
+
+def run_scheduler(app):
+    """Run the checks in the foreground; used by the dedicated scheduler process"""
+    scheduler = BlockingScheduler()
+    _add_jobs(scheduler, app)
+    app.logger.info("Starting website check scheduler")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        app.logger.info("Scheduler stopped")
+
+def run_worker(app, worker_id=None):
+    """Run as one of several check workers, each checking its own shard of websites"""
+    from sharding import ShardWorker, HEARTBEAT_SECONDS
+
+    worker = ShardWorker(worker_id)
+    dispatcher = None
+
+    def heartbeat():
+        with app.app_context():
+            nodes = worker.ring.nodes
+            worker.heartbeat()
+        if dispatcher and worker.ring.nodes != nodes:
+            dispatcher.reload()
+
+    heartbeat()
+    scheduler = BlockingScheduler()
+    scheduler.add_job(
+        func=heartbeat,
+        trigger='interval',
+        seconds=HEARTBEAT_SECONDS,
+        id='worker_heartbeat',
+        name='Worker heartbeat'
+    )
+    dispatcher = _add_jobs(scheduler, app, owns=worker.owns, shard=worker.shard)
+
+    # Leave the ring on `docker stop` too, not only on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    app.logger.info(f"Starting check worker {worker.worker_id}")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        app.logger.info(f"Check worker {worker.worker_id} stopped")
+    finally:
+        with app.app_context():
+            worker.leave()
+
+if __name__ == '__main__':
+    from main import app
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        run_worker(app, sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        run_scheduler(app)
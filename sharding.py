@@ -0,0 +1,87 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from models import db, CheckWorker
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+# A worker missing this many seconds of heartbeats is dropped from the ring
+WORKER_TIMEOUT_SECONDS = HEARTBEAT_SECONDS * 3
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+class HashRing:
+    """Consistent hash ring; each node is placed at `replicas` virtual points"""
+
+    def __init__(self, nodes, replicas=100):
+        points = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(replicas)
+        )
+        self.nodes = sorted(set(nodes))
+        self._keys = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def get_node(self, key):
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(str(key))) % len(self._keys)
+        return self._owners[index]
+
+class ShardWorker:
+    """A check worker that owns the websites hashing onto it in the ring"""
+
+    def __init__(self, worker_id=None):
+        self.worker_id = worker_id or os.getenv('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+        self.ring = HashRing([self.worker_id])
+
+    def heartbeat(self):
+        """Record that this worker is alive and rebuild the ring from live workers"""
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(seconds=WORKER_TIMEOUT_SECONDS)
+        try:
+            worker = CheckWorker.query.get(self.worker_id)
+            if worker is None:
+                worker = CheckWorker(id=self.worker_id, hostname=socket.gethostname(), started_at=now)
+                db.session.add(worker)
+                logger.info(f"Worker {self.worker_id} joined")
+            worker.last_heartbeat = now
+            db.session.flush()
+
+            # Drop workers that stopped without leaving
+            CheckWorker.query.filter(CheckWorker.last_heartbeat < cutoff).delete()
+            db.session.commit()
+
+            live = [row.id for row in CheckWorker.query.with_entities(CheckWorker.id)]
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Heartbeat failed for worker {self.worker_id}: {str(e)}")
+            return
+
+        if sorted(live) != self.ring.nodes:
+            logger.info(f"Rebalancing worker {self.worker_id}: {len(live)} live workers")
+            self.ring = HashRing(live)
+
+    def leave(self):
+        """Remove this worker so the others take over its shard right away"""
+        try:
+            CheckWorker.query.filter_by(id=self.worker_id).delete()
+            db.session.commit()
+            logger.info(f"Worker {self.worker_id} left")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error removing worker {self.worker_id}: {str(e)}")
+
+    def owns(self, website_id):
+        return self.ring.get_node(website_id) == self.worker_id
+
+    def shard(self):
+        """(index of this worker among the live workers, number of live workers)"""
+        nodes = self.ring.nodes
+        return (nodes.index(self.worker_id) if self.worker_id in nodes else 0), len(nodes)
@@ -18,8 +18,8 @@ function getStatusText(website) {
         return 'Website is currently unreachable';
     }
 
-    const lastVisited = website.last_visited ? new Date(website.last_visited + 'Z') : null;
-    const lastChange = website.last_change ? new Date(website.last_change + 'Z') : null;
+    const lastVisited = website.last_visited ? new Date(website.last_visited) : null;
+    const lastChange = website.last_change ? new Date(website.last_change) : null;
 
     if (lastChange && lastVisited && lastChange > lastVisited) {
         return 'Changes detected since your last visit';
@@ -28,16 +28,32 @@ function getStatusText(website) {
     return 'No new changes';
 }
 
+// Visiting a website resets last_change, so any value means unseen changes
+function getStatusClass(website) {
+    if (!website.is_reachable) {
+        return 'status-red';
+    }
+    return website.last_change ? 'status-green' : 'status-gray';
+}
+
+function getStatusTitle(website) {
+    if (!website.is_reachable) {
+        return 'Unreachable';
+    }
+    if (!website.last_change) {
+        return 'No changes';
+    }
+    const regions = website.changed_regions || [];
+    return regions.length ? `Changes detected in:\n${regions.join('\n')}` : 'Changes detected';
+}
+
 // Helper function to format dates in local time
 function formatLocalDateTime(utcDateString) {
     if (!utcDateString) return 'Never';  // Handle null/undefined dates
     
     try {
-        // Remove the Z if the string already has a timezone offset
-        const cleanDateString = utcDateString.replace(/\+00:00Z$/, '+00:00');
-        
         // Parse the date
-        const date = new Date(cleanDateString);
+        const date = new Date(utcDateString);
         if (isNaN(date.getTime())) {  // Check if date is valid
             console.error('Invalid date:', utcDateString);
             return 'Invalid date';
@@ -58,6 +74,93 @@ function formatLocalDateTime(utcDateString) {
         return 'Error';
     }
 }
+
+function createMetadataItem(className, iconClass, label, utcDateString) {
+    const item = document.createElement('span');
+    item.className = `metadata-item ${className}`;
+
+    const icon = document.createElement('i');
+    icon.className = `fas ${iconClass}`;
+
+    const datetime = document.createElement('span');
+    datetime.className = 'datetime';
+    datetime.setAttribute('data-utc', utcDateString || '');
+    datetime.textContent = formatLocalDateTime(utcDateString);
+
+    item.append(icon, ` ${label}: `, datetime);
+    return item;
+}
+
+// Build the markup of a single .link-card from the /api/websites JSON
+function renderWebsiteCard(website) {
+    const card = document.createElement('div');
+    card.className = 'link-card';
+    card.dataset.websiteId = website.id;
+
+    const statusDot = document.createElement('span');
+    statusDot.className = `status-dot ${getStatusClass(website)}`;
+    statusDot.title = getStatusTitle(website);
+
+    const link = document.createElement('a');
+    link.href = website.url;
+    link.target = '_blank';
+    link.rel = 'noopener noreferrer';
+    link.className = 'link-url';
+    link.textContent = website.url;
+
+    const metadata = document.createElement('div');
+    metadata.className = 'link-metadata';
+    metadata.append(
+        createMetadataItem('check-time', 'fa-clock', 'Checked', website.last_check),
+        createMetadataItem('visit-time', 'fa-eye', 'Visited', website.last_visited),
+        createMetadataItem('add-time', 'fa-plus', 'Added', website.date_added)
+    );
+
+    const content = document.createElement('div');
+    content.className = 'link-content';
+    content.append(link, metadata);
+
+    const status = document.createElement('div');
+    status.className = 'link-status';
+    status.append(statusDot, content);
+
+    const intervalInput = document.createElement('input');
+    intervalInput.type = 'number';
+    intervalInput.min = '1';
+    intervalInput.max = '24';
+    intervalInput.value = website.check_interval;
+    intervalInput.className = 'interval-input';
+    intervalInput.dataset.websiteId = website.id;
+
+    const intervalLabel = document.createElement('span');
+    intervalLabel.className = 'interval-label';
+    intervalLabel.textContent = 'hrs';
+
+    const updateBtn = document.createElement('button');
+    updateBtn.className = 'update-btn';
+    updateBtn.textContent = 'Update';
+    updateBtn.addEventListener('click', () => updateInterval(website.id));
+
+    const intervalControl = document.createElement('div');
+    intervalControl.className = 'interval-control';
+    intervalControl.append(intervalInput, intervalLabel, updateBtn);
+
+    const deleteBtn = document.createElement('button');
+    deleteBtn.className = 'delete-btn';
+    deleteBtn.innerHTML = '<span class="delete-icon">×</span>';
+    deleteBtn.addEventListener('click', () => deleteWebsite(website.id));
+
+    const controls = document.createElement('div');
+    controls.className = 'link-controls';
+    controls.append(intervalControl, deleteBtn);
+
+    const info = document.createElement('div');
+    info.className = 'link-info';
+    info.append(status, controls);
+
+    card.appendChild(info);
+    return card;
+}
 // Core functions
 async function handleAddWebsite(event) {
     event.preventDefault();
@@ -198,28 +301,26 @@ window.updateInterval = async function(websiteId) {
 };
 
 // Add input change handler to enable/disable update button
-function setupIntervalInputs() {
-    document.querySelectorAll('.interval-input').forEach(input => {
-        const updateBtn = input.parentElement.querySelector('.update-btn');
-        const originalValue = input.value;
-        
-        // Initially disable update button
-        updateBtn.disabled = true;
-        
-        // Enable/disable button based on value changes
-        input.addEventListener('input', () => {
-            const newValue = input.value;
-            const isValid = !isNaN(newValue) && newValue >= 1 && newValue <= 24;
-            updateBtn.disabled = newValue === originalValue || !isValid;
-        });
-        
-        // Handle Enter key
-        input.addEventListener('keypress', (e) => {
-            if (e.key === 'Enter' && !updateBtn.disabled) {
-                e.preventDefault();
-                updateInterval(input.dataset.websiteId);
-            }
-        });
+function setupIntervalInput(input) {
+    const updateBtn = input.parentElement.querySelector('.update-btn');
+    const originalValue = input.value;
+    
+    // Initially disable update button
+    updateBtn.disabled = true;
+    
+    // Enable/disable button based on value changes
+    input.addEventListener('input', () => {
+        const newValue = input.value;
+        const isValid = !isNaN(newValue) && newValue >= 1 && newValue <= 24;
+        updateBtn.disabled = newValue === originalValue || !isValid;
+    });
+    
+    // Handle Enter key
+    input.addEventListener('keypress', (e) => {
+        if (e.key === 'Enter' && !updateBtn.disabled) {
+            e.preventDefault();
+            updateInterval(input.dataset.websiteId);
+        }
     });
 }
 
@@ -246,39 +347,6 @@ window.deleteWebsite = async function(websiteId) {
     }
 };
 
-// Move updateLastVisited function definition before DOMContentLoaded
-async function updateLastVisited(websiteId) {
-    try {
-        const response = await fetch(`/api/websites/${websiteId}/visit`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            }
-        });
-
-        if (response.ok) {
-            const data = await response.json();
-            const linkCard = document.querySelector(`[data-website-id="${websiteId}"]`);
-            const visitedSpan = linkCard.querySelector('.visit-time .datetime');
-            if (visitedSpan && data.last_visited) {
-                visitedSpan.setAttribute('data-utc', data.last_visited);
-                visitedSpan.textContent = formatLocalDateTime(data.last_visited);
-                
-                // Update status dot
-                const statusDot = linkCard.querySelector('.status-dot');
-                if (statusDot) {
-                    statusDot.classList.remove('status-green');
-                    statusDot.classList.add('status-gray');
-                }
-            }
-        } else {
-            console.error('Failed to update last visited timestamp');
-        }
-    } catch (error) {
-        console.error('Error updating last visited:', error);
-    }
-}
-
 // Add the remove all function
 async function removeAllWebsites() {
     if (!confirm('Are you sure you want to remove all websites? This action cannot be undone.')) {
@@ -432,35 +500,22 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    // Setup interval input handlers
-    setupIntervalInputs();
-
-    // Convert all UTC timestamps to local time
-    document.querySelectorAll('.datetime').forEach(element => {
-        const utcDate = element.getAttribute('data-utc');
-        element.textContent = formatLocalDateTime(utcDate);
-    });
-
     // Set up remove all button
     const removeAllButton = document.getElementById('remove-all-button');
     if (removeAllButton) {
         removeAllButton.addEventListener('click', removeAllWebsites);
     }
 
-    const monitor = new WebsiteMonitor();
-
-    // Add click handler to links
-    document.querySelectorAll('.link-url').forEach(link => {
-        link.addEventListener('click', (e) => {
-            const websiteId = link.closest('.link-card').dataset.websiteId;
-            updateLastVisited(websiteId);
-        });
-    });
+    const websiteList = document.getElementById('website-list');
+    if (websiteList) {
+        new WebsiteMonitor(websiteList);
+    }
 });
 
 class WebsiteCard {
-    constructor(cardElement) {
+    constructor(cardElement, monitor) {
         this.card = cardElement;
+        this.monitor = monitor;
         this.websiteId = cardElement.dataset.websiteId;
         this.statusDot = cardElement.querySelector('.status-dot');
         this.visitedSpan = cardElement.querySelector('.visit-time .datetime');
@@ -471,6 +526,7 @@ class WebsiteCard {
     bindEvents() {
         const link = this.card.querySelector('.link-url');
         link.addEventListener('click', () => this.handleVisit());
+        setupIntervalInput(this.card.querySelector('.interval-input'));
     }
 
     async handleVisit() {
@@ -482,6 +538,7 @@ class WebsiteCard {
             if (response.ok) {
                 const data = await response.json();
                 this.updateUI(data);
+                this.monitor.refreshSummary();
             }
         } catch (error) {
             console.error('Error updating visit:', error);
@@ -500,44 +557,101 @@ class WebsiteCard {
         }
         
         // Update status
-        this.statusDot.className = 'status-dot';
-        if (!data.is_reachable) {
-            this.statusDot.classList.add('status-red');
-        } else if (data.last_check > data.last_visited) {
-            this.statusDot.classList.add('status-green');
-        } else {
-            this.statusDot.classList.add('status-gray');
-        }
+        this.statusDot.className = `status-dot ${getStatusClass(data)}`;
+        this.statusDot.title = getStatusTitle(data);
     }
 }
 
 class WebsiteMonitor {
-    constructor() {
+    constructor(listElement) {
+        this.list = listElement;
+        this.pageSize = parseInt(listElement.closest('.links-container').dataset.pageSize) || 50;
         this.cards = new Map();
-        this.initializeCards();
+        this.offset = 0;
+        this.loading = false;
+        this.exhausted = false;
+        this.observeSentinel();
         this.startPolling();
     }
 
-    initializeCards() {
-        document.querySelectorAll('.link-card').forEach(cardElement => {
-            const card = new WebsiteCard(cardElement);
-            this.cards.set(card.websiteId, card);
-        });
+    // Fetch the next page whenever the end of the list scrolls into view
+    observeSentinel() {
+        const sentinel = document.getElementById('website-list-sentinel');
+        this.observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                this.loadNextPage();
+            }
+        }, { rootMargin: '400px' });
+        this.observer.observe(sentinel);
     }
 
-    async pollUpdates() {
+    async loadNextPage() {
+        if (this.loading || this.exhausted) {
+            return;
+        }
+        this.loading = true;
+
         try {
-            const response = await fetch('/api/websites');
+            const response = await fetch(`/api/websites?offset=${this.offset}&limit=${this.pageSize}`);
             const websites = await response.json();
-            
+
+            const fragment = document.createDocumentFragment();
             websites.forEach(website => {
-                const card = this.cards.get(website.id.toString());
-                if (card) {
-                    card.updateUI(website);
+                if (this.cards.has(website.id.toString())) {
+                    return;
                 }
+                const cardElement = renderWebsiteCard(website);
+                fragment.appendChild(cardElement);
+                const card = new WebsiteCard(cardElement, this);
+                this.cards.set(card.websiteId, card);
+            });
+            this.list.appendChild(fragment);
+
+            this.offset += websites.length;
+            if (websites.length < this.pageSize) {
+                this.exhausted = true;
+                this.observer.disconnect();
+            }
+        } catch (error) {
+            console.error('Error loading websites:', error);
+        } finally {
+            this.loading = false;
+        }
+    }
+
+    async refreshSummary() {
+        try {
+            const response = await fetch('/api/websites/summary');
+            const summary = await response.json();
+
+            document.querySelectorAll('[data-summary]').forEach(element => {
+                element.textContent = summary[element.dataset.summary];
             });
         } catch (error) {
-            console.error('Error polling updates:', error);
+            console.error('Error refreshing summary:', error);
+        }
+    }
+
+    async pollUpdates() {
+        this.refreshSummary();
+
+        // Only refresh cards that have been loaded, one page at a time
+        const ids = Array.from(this.cards.keys());
+        for (let i = 0; i < ids.length; i += this.pageSize) {
+            try {
+                const chunk = ids.slice(i, i + this.pageSize).join(',');
+                const response = await fetch(`/api/websites?ids=${chunk}`);
+                const websites = await response.json();
+
+                websites.forEach(website => {
+                    const card = this.cards.get(website.id.toString());
+                    if (card) {
+                        card.updateUI(website);
+                    }
+                });
+            } catch (error) {
+                console.error('Error polling updates:', error);
+            }
         }
     }
 
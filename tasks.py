@@ -1,13 +1,28 @@
+import os
+import json
 from urllib.request import urlopen, Request
 from urllib.error import URLError
 from datetime import datetime, timedelta, timezone
-from models import db, Website
+from models import db, Website, CheckResult
 from flask import current_app
 import logging
-from utils.email import send_unreachable_notification
+from utils.email import send_unreachable_notification, send_rule_notification
+from fingerprint import build_fingerprint_tree, diff_fingerprint_trees, resolve_regions, filter_regions, page_text
+from rules import rule_signature, compile_rules
+from fetch_cache import FetchCache, FetchResult
+from profiling import trace_check, span
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on region paths stored for a single change
+MAX_CHANGED_REGIONS = 20
+
+# Check history kept for export
+CHECK_RESULT_RETENTION_DAYS = int(os.getenv('CHECK_RESULT_RETENTION_DAYS', 90))
+
+# Recent fetches by canonical URL, shared by all checks in this process
+fetch_cache = FetchCache()
+
 def check_website_reachability(url, timeout=5):
     try:
         headers = {
@@ -44,64 +59,145 @@ def get_website_content(response):
         logger.error(f"Error getting content: {str(e)}")
         return None
 
+def fetch_website(url):
+    """Fetch a URL once and keep what the checks need, for sharing through fetch_cache"""
+    with span('fetch.request'):
+        is_reachable, response = check_website_reachability(url)
+    if not (is_reachable and response):
+        return FetchResult(False)
+    
+    with span('fetch.read'):
+        content = get_website_content(response)
+        response.close()
+    logger.info(f"Successfully fetched {url}, content length: {len(content) if content else 0}")
+    return FetchResult(
+        True,
+        status=getattr(response, 'status', None),
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        content=content
+    )
+
+def parse_fetch_result(result):
+    """Fingerprint the fetched page once, however many websites share the result"""
+    if result.fingerprint is None:
+        tree, soup, _ = build_fingerprint_tree(result.content)
+        result.text = page_text(soup)
+        result.fingerprint = json.dumps(tree, separators=(',', ':'))
+    return result.fingerprint, result.text
+
+def update_fingerprint(website, fingerprint, content, current_time):
+    """Compare the page's region tree with the stored one and record changed regions"""
+    changed = []
+    if website.fingerprint and website.fingerprint != fingerprint:
+        changed = diff_fingerprint_trees(json.loads(website.fingerprint), json.loads(fingerprint))
+        watch = website.load_json(website.watch_regions)
+        ignore = website.load_json(website.ignore_regions)
+        if changed and (watch or ignore):
+            # Selectors need the parsed page, which the fetch cache doesn't keep
+            _, soup, paths = build_fingerprint_tree(content)
+            changed = filter_regions(
+                changed,
+                watch=resolve_regions(soup, paths, watch),
+                ignore=resolve_regions(soup, paths, ignore)
+            )
+        if changed:
+            logger.info(f"Content changed for {website.url} in {len(changed)} region(s)")
+            website.last_change = current_time
+            website.changed_regions = json.dumps(changed[:MAX_CHANGED_REGIONS])
+    
+    website.fingerprint = fingerprint
+    return changed[:MAX_CHANGED_REGIONS]
+
+def evaluate_watch_rules(website, text, current_time):
+    """Evaluate all of the website's watch rules in one pass; rules that became true count as a change"""
+    rules = website.rules.all()
+    if not rules:
+        return []
+    
+    results = compile_rules(rule_signature(rules)).evaluate(text)
+    triggered = []
+    for rule in rules:
+        if rule.id not in results:
+            # Timed out; keep the last result
+            continue
+        is_met, value = results[rule.id]
+        # The first evaluation only records a baseline, so a condition that already holds doesn't fire
+        if is_met and rule.is_met is False:
+            rule.last_triggered = current_time
+            triggered.append(rule)
+        rule.is_met = is_met
+        rule.last_value = value
+    
+    if triggered:
+        logger.info(f"{len(triggered)} watch rule(s) triggered for {website.url}")
+        website.last_change = current_time
+        try:
+            with span('compare.notify'):
+                send_rule_notification(website.user, website, triggered)
+        except Exception as e:
+            logger.error(f"Error sending rule notification for {website.url}: {str(e)}")
+    return triggered
+
 def check_website_changes(website_ids):
     """Check websites for content changes"""
     current_time = datetime.now(timezone.utc)
     
     for website_id in website_ids:
-        website = Website.query.get(website_id)
-        if not website:
-            continue
-            
-        logger.info(f"Checking website {website.url}")
-        try:
-            is_reachable, response = check_website_reachability(website.url)
-            content = None
-            
-            if is_reachable and response:
-                content = get_website_content(response)
-                logger.info(f"Successfully checked {website.url}, content length: {len(content) if content else 0}")
+        with trace_check(website_id, None) as trace:
+            url = f"#{website_id}"
+            try:
+                with span('load'):
+                    website = Website.query.get(website_id)
+                if not website:
+                    continue
+                url = trace.url = website.url
+
+                logger.info(f"Checking website {website.url}")
+                with span('fetch'):
+                    result = fetch_cache.get_or_fetch(website.url, fetch_website)
+                changed_regions = []
+                triggered = []
                 
-                if website.last_content and content != website.last_content:
-                    logger.info(f"Content changed for {website.url}")
-                    website.last_change = current_time
-            else:
-                logger.warning(f"Website {website.url} is not reachable")
-            
-            website.is_reachable = is_reachable
-            website.last_content = content
-            website.last_check = current_time
-            
-            db.session.commit()
-            logger.info(f"Updated database for {website.url}")
-            
-        except Exception as e:
-            logger.error(f"Error checking website {website.url}: {str(e)}")
+                if result.is_reachable:
+                    if result.content is not None:
+                        with span('parse'):
+                            fingerprint, text = parse_fetch_result(result)
+                        with span('compare'):
+                            changed_regions = update_fingerprint(website, fingerprint, result.content, current_time)
+                            triggered = evaluate_watch_rules(website, text, current_time)
+                else:
+                    logger.warning(f"Website {website.url} is not reachable")
+                
+                website.is_reachable = result.is_reachable
+                website.last_content = None  # Only the fingerprint tree is kept
+                website.last_check = current_time
+                db.session.add(CheckResult(
+                    website_id=website.id,
+                    checked_at=current_time,
+                    is_reachable=result.is_reachable,
+                    changed=bool(changed_regions or triggered),
+                    changed_regions=json.dumps(changed_regions) if changed_regions else None,
+                    triggered_rules=json.dumps([rule.id for rule in triggered]) if triggered else None
+                ))
+                
+                with span('commit'):
+                    db.session.commit()
+                logger.info(f"Updated database for {website.url}")
+                
+            except Exception as e:
+                # Leave the session usable for the rest of the batch
+                db.session.rollback()
+                logger.error(f"Error checking website {url}: {str(e)}")
 
-def schedule_periodic_checks(app):
-    """Identify websites that need checking based on their intervals"""
+def prune_check_results(app):
+    """Delete check results older than the retention period"""
     with app.app_context():
-        logger.info("Checking for websites due for content check")  # More accurate description
-        websites = Website.query.all()
-        now = datetime.now(timezone.utc)
-        
-        for website in websites:
-            if website.last_check is None:
-                logger.info(f"Website {website.url} has never been checked, initiating first check")
-                check_website_changes([website.id])
-            else:
-                last_check = website.last_check.replace(tzinfo=timezone.utc)
-                time_since_check = now - last_check
-                if time_since_check >= timedelta(hours=website.check_interval):
-                    logger.info(
-                        f"Website {website.url} is due for check: "
-                        f"last check was {time_since_check} ago, "
-                        f"check interval is {website.check_interval} hours"
-                    )
-                    check_website_changes([website.id])
-                else:
-                    logger.debug(
-                        f"Website {website.url} not due for check yet: "
-                        f"last check was {time_since_check} ago, "
-                        f"check interval is {website.check_interval} hours"
-                    )
\ No newline at end of file
+        cutoff = datetime.now(timezone.utc) - timedelta(days=CHECK_RESULT_RETENTION_DAYS)
+        try:
+            deleted = CheckResult.query.filter(CheckResult.checked_at < cutoff).delete(synchronize_session=False)
+            db.session.commit()
+            logger.info(f"Pruned {deleted} check results older than {CHECK_RESULT_RETENTION_DAYS} days")
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error pruning check results: {str(e)}")
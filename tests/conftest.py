@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from main import create_app  # noqa: E402
+from models import db  # noqa: E402
+
+
+def _skip_fsync(connection, record):
+    # A throwaway database doesn't need to survive a crash, and fsync on
+    # every commit would make the tests measure the disk
+    connection.execute('PRAGMA synchronous=OFF')
+
+
+def make_app(db_path):
+    """The app bound to a throwaway SQLite database"""
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'MAIL_SUPPRESS_SEND': True,
+    })
+    with app.app_context():
+        event.listen(db.engine, 'connect', _skip_fsync)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path / 'test.db')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from conftest import make_app
+from fairshare import DEFAULT_USER_QUOTA
+from models import db, User, Website
+
+
+def test_every_app_gets_the_routes(tmp_path):
+    first = make_app(tmp_path / 'first.db')
+    second = make_app(tmp_path / 'second.db')
+    for app in (first, second):
+        rules = {rule.rule for rule in app.url_map.iter_rules()}
+        assert {'/', '/login', '/api/websites', '/api/export/checks'} <= rules
+
+
+def test_login_required_redirects_to_login(app):
+    client = app.test_client()
+    assert client.get('/').status_code == 200
+    response = client.get('/api/websites')
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+
+def test_register_and_log_in(app):
+    client = app.test_client()
+    response = client.post('/register', data={'username': 'ada', 'password': 'pw', 'password2': 'pw'})
+    assert response.status_code == 302
+    assert User.query.filter_by(username='ada').count() == 1
+
+    response = client.post('/login', data={'username': 'ada', 'password': 'pw'})
+    assert response.status_code == 302
+    assert client.get('/api/websites').get_json() == []
+    assert client.get('/').status_code == 200
+
+
+def test_check_lag(app):
+    client = app.test_client()
+    client.post('/register', data={'username': 'lag', 'password': 'pw', 'password2': 'pw'})
+    client.post('/login', data={'username': 'lag', 'password': 'pw'})
+    user = User.query.filter_by(username='lag').one()
+
+    now = datetime.now(timezone.utc)
+    websites = [
+        Website.create('http://example.com/new', 24, user.id, now - timedelta(minutes=10)),
+        Website.create('http://example.com/late', 1, user.id, now - timedelta(days=2)),
+        Website.create('http://example.com/fresh', 24, user.id, now - timedelta(days=2)),
+    ]
+    websites[1].last_check = now - timedelta(hours=3)
+    websites[2].last_check = now - timedelta(hours=1)
+    db.session.add_all(websites)
+    db.session.commit()
+
+    lag = client.get('/api/user/lag').get_json()
+    assert lag['websites'] == 3
+    assert lag['due'] == 2
+    assert lag['max_lag_seconds'] == pytest.approx(2 * 3600, abs=5)
+    assert lag['mean_lag_seconds'] == pytest.approx((10 * 60 + 2 * 3600) / 2, abs=5)
+    assert lag['check_quota'] == DEFAULT_USER_QUOTA
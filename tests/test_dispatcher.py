@@ -0,0 +1,126 @@
+import http.server
+import socketserver
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from dispatcher import CheckDispatcher, RETRY_SECONDS
+from fairshare import CHECK_CAPACITY, split_share
+from models import db, User, Website
+from sharding import HashRing, ShardWorker
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"<html><body><p>{self.path}</p></body></html>".encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+@pytest.fixture
+def dispatcher(app):
+    server = _Server(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    user = User(username='dispatch')
+    db.session.add(user)
+    db.session.flush()
+    for i in range(5):
+        db.session.add(Website.create(f"http://127.0.0.1:{server.server_address[1]}/{i}", 24, user.id))
+    db.session.commit()
+
+    dispatcher = CheckDispatcher(app)
+    dispatcher.sync()
+    yield dispatcher
+    server.shutdown()
+
+
+def _fail_once(monkeypatch, target, name):
+    original = getattr(target, name)
+    calls = []
+
+    def fail_first(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise OperationalError('statement', {}, Exception('database is locked'))
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(target, name, fail_first)
+
+
+def test_failed_check_does_not_drop_the_batch(dispatcher, monkeypatch):
+    _fail_once(monkeypatch, db.session, 'commit')
+
+    now = time.time()
+    assert dispatcher.dispatch(now) == 5
+
+    assert len(dispatcher.queue) == 5
+    checked = Website.query.filter(Website.last_check.isnot(None)).count()
+    assert checked == 4
+    # The failed website is retried soon, the others at their interval
+    due = sorted(dispatcher.queue.due(dispatcher.queue.due_users(now + 86400)[0], now + 86400))
+    assert now + RETRY_SECONDS <= due[0][0] < now + 2 * RETRY_SECONDS
+    assert all(due_at > now + 23 * 3600 for due_at, _ in due[1:])
+
+
+def test_failed_reschedule_retries_the_batch(dispatcher, monkeypatch):
+    monkeypatch.setattr('dispatcher.check_website_changes', lambda website_ids: None)
+    _fail_once(monkeypatch, db.session, 'query')
+
+    now = time.time()
+    assert dispatcher.dispatch(now) == 5
+    assert len(dispatcher.queue) == 5
+    assert dispatcher.queue.next_due() >= now + RETRY_SECONDS
+
+
+def test_split_share_adds_up():
+    for total in (0, 1, 7, 60, 120):
+        for parts in (1, 3, 8):
+            for offset in range(parts):
+                assert sum(split_share(total, parts, index + offset) for index in range(parts)) == total
+
+
+def _dispatch_across_workers(app, users, workers, monkeypatch):
+    """One dispatch on each of `workers` shard workers for [(quota, websites)] users; returns how many were checked"""
+    checked = []
+    monkeypatch.setattr('dispatcher.check_website_changes', checked.extend)
+    for i, (quota, websites) in enumerate(users):
+        user = User(username=f"user-{i}", check_quota=quota)
+        db.session.add(user)
+        db.session.flush()
+        for n in range(websites):
+            db.session.add(Website.create(f"http://example.com/{i}/{n}", 24, user.id))
+    db.session.commit()
+
+    nodes = [f"worker-{i}" for i in range(workers)]
+    now = time.time()
+    for node in nodes:
+        worker = ShardWorker(node)
+        worker.ring = HashRing(nodes)
+        dispatcher = CheckDispatcher(app, owns=worker.owns, shard=worker.shard)
+        dispatcher.sync()
+        dispatcher.start_window()
+        dispatcher.dispatch(now)
+
+    assert len(set(checked)) == len(checked)
+    return len(checked)
+
+
+def test_user_quota_holds_across_workers(app, monkeypatch):
+    assert _dispatch_across_workers(app, [(30, 400)], 4, monkeypatch) == 30
+
+
+def test_capacity_holds_across_workers(app, monkeypatch):
+    assert _dispatch_across_workers(app, [(1000, 200)] * 4, 4, monkeypatch) == CHECK_CAPACITY
@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from models import db, User, Website, CheckResult, utc_isoformat
+
+
+def _client(app):
+    client = app.test_client()
+    client.post('/register', data={'username': 'export', 'password': 'pw', 'password2': 'pw'})
+    client.post('/login', data={'username': 'export', 'password': 'pw'})
+    user = User.query.filter_by(username='export').one()
+
+    website = Website.create('http://example.com/', 24, user.id, datetime(2026, 10, 19, 17, 17, 5, 378311, tzinfo=timezone.utc))
+    db.session.add(website)
+    db.session.flush()
+    db.session.add(CheckResult(
+        website_id=website.id,
+        checked_at=datetime(2026, 10, 19, 18, 0, 0),
+        is_reachable=True,
+        changed=True,
+        changed_regions=json.dumps(['body > main[1]'])
+    ))
+    db.session.commit()
+    return client
+
+
+def test_utc_isoformat():
+    assert utc_isoformat(None) is None
+    assert utc_isoformat(datetime(2026, 10, 19, 17, 17, 5, 378311)) == '2026-10-19T17:17:05.378311Z'
+    assert utc_isoformat(datetime(2026, 10, 19, 17, 17, 5, tzinfo=timezone.utc)) == '2026-10-19T17:17:05Z'
+
+
+def test_ndjson_export_has_valid_timestamps(app):
+    client = _client(app)
+
+    rows = [json.loads(line) for line in client.get('/api/export/websites').get_data(as_text=True).splitlines()]
+    assert rows[0]['date_added'] == '2026-10-19T17:17:05.378311Z'
+    assert rows[0]['last_check'] is None
+
+    rows = [json.loads(line) for line in client.get('/api/export/changes').get_data(as_text=True).splitlines()]
+    assert rows[0]['checked_at'] == '2026-10-19T18:00:00Z'
+    assert rows[0]['changed_regions'] == ['body > main[1]']
+    assert datetime.fromisoformat(rows[0]['checked_at']) == datetime(2026, 10, 19, 18, tzinfo=timezone.utc)
+
+
+def test_csv_export(app):
+    client = _client(app)
+    response = client.get('/api/export/checks?format=csv')
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert rows[0]['checked_at'] == '2026-10-19T18:00:00Z'
+    assert rows[0]['changed_regions'] == '["body > main[1]"]'
+    assert rows[0]['triggered_rules'] == '[]'
@@ -0,0 +1,77 @@
+import heapq
+
+from fairshare import FairQueue
+
+CAPACITY = 120
+QUOTA = 60
+
+
+def _simulate(users, minutes):
+    """Run the scheduler once a minute for {user_id: (websites, interval in minutes)}.
+
+    Every website starts out due. Returns the lag, in minutes, of each
+    user's dispatched checks, and the number of checks dispatched per run.
+    """
+    due = {
+        user_id: [(0, (user_id, n)) for n in range(websites)]
+        for user_id, (websites, _) in users.items()
+    }
+    lags = {user_id: [] for user_id in users}
+    dispatched = []
+    fair_queue = FairQueue()
+
+    for now in range(minutes):
+        fair_queue.reset()
+        ready = {}
+        for user_id, heap in due.items():
+            entries = []
+            while heap and heap[0][0] <= now:
+                entries.append(heapq.heappop(heap))
+            if entries:
+                ready[user_id] = entries
+                fair_queue.enqueue(user_id, [website for _, website in entries], quota=QUOTA)
+
+        selected = set(fair_queue.dequeue(CAPACITY))
+        dispatched.append(len(selected))
+
+        for user_id, entries in ready.items():
+            interval = users[user_id][1]
+            for due_at, website in entries:
+                if website in selected:
+                    lags[user_id].append(now - due_at)
+                    heapq.heappush(due[user_id], (now + interval, website))
+                else:
+                    heapq.heappush(due[user_id], (due_at, website))
+    return lags, dispatched
+
+
+def test_small_users_have_bounded_lag_next_to_a_large_one():
+    users = {'large': (20000, 24 * 60)}
+    users.update({f"small-{i}": (10, 60) for i in range(50)})
+
+    lags, dispatched = _simulate(users, minutes=180)
+
+    small_lags = [lag for user_id, user_lags in lags.items() if user_id != 'large' for lag in user_lags]
+    # Each small website is checked about every hour despite the large backlog
+    assert len(small_lags) >= 50 * 10 * 3
+    assert max(small_lags) <= 5
+    # The large user still works through its backlog at close to its quota
+    assert min(dispatched) >= QUOTA
+    assert len(lags['large']) >= 0.9 * 180 * QUOTA
+
+
+def test_weight_sets_the_share_of_capacity():
+    fair_queue = FairQueue()
+    fair_queue.enqueue('heavy', list(range(1000)), weight=3.0)
+    fair_queue.enqueue('light', list(range(1000, 2000)), weight=1.0)
+    fair_queue.dequeue(400)
+    assert fair_queue.served == {'heavy': 300, 'light': 100}
+
+
+def test_quota_caps_a_user_per_run():
+    fair_queue = FairQueue()
+    fair_queue.enqueue('capped', list(range(1000)), quota=10)
+    fair_queue.enqueue('other', list(range(1000, 1005)))
+    selected = fair_queue.dequeue(100)
+    assert fair_queue.served == {'capped': 10, 'other': 5}
+    assert len(selected) == 15
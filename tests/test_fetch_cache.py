@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from fetch_cache import FetchCache, FetchResult, canonical_url
+
+
+class CountingFetch:
+    """Fake fetch that counts calls per URL and can be held until released"""
+
+    def __init__(self, content='<p>page</p>', hold=False):
+        self.content = content
+        self.calls = {}
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def __call__(self, url):
+        self.calls[url] = self.calls.get(url, 0) + 1
+        self.release.wait(5)
+        return FetchResult(True, status=200, content=self.content)
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_canonical_url():
+    assert canonical_url('HTTP://Example.COM:80') == 'http://example.com/'
+    assert canonical_url('https://example.com:443/a?b=1#top') == 'https://example.com/a?b=1'
+    assert canonical_url('https://example.com:8443/a') == 'https://example.com:8443/a'
+
+
+def test_concurrent_requests_share_one_fetch():
+    cache = FetchCache()
+    fetch = CountingFetch(hold=True)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_fetch('http://example.com/', fetch)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.misses + cache.coalesced == 8)
+    fetch.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert fetch.calls == {'http://example.com/': 1}
+    assert len(results) == 8 and all(result is results[0] for result in results)
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['coalesced'] == 7
+
+
+def test_failed_fetch_is_raised_to_every_caller_and_not_cached():
+    cache = FetchCache()
+    release = threading.Event()
+    calls = []
+
+    def failing(url):
+        calls.append(url)
+        release.wait(5)
+        raise OSError('connection reset')
+
+    errors = []
+
+    def check():
+        try:
+            cache.get_or_fetch('http://example.com/', failing)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=check) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.misses + cache.coalesced == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 3
+    assert cache.stats()['size'] == 0
+
+
+def test_results_expire_after_the_ttl():
+    cache = FetchCache(ttl=0.05)
+    fetch = CountingFetch()
+    cache.get_or_fetch('http://example.com/', fetch)
+    cache.get_or_fetch('http://EXAMPLE.com', fetch)
+    assert fetch.calls == {'http://example.com/': 1}
+
+    time.sleep(0.1)
+    cache.get_or_fetch('http://example.com/', fetch)
+    assert fetch.calls == {'http://example.com/': 2}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = FetchCache(maxsize=2)
+    fetch = CountingFetch()
+    cache.get_or_fetch('http://a.example/', fetch)
+    cache.get_or_fetch('http://b.example/', fetch)
+    cache.get_or_fetch('http://a.example/', fetch)
+    cache.get_or_fetch('http://c.example/', fetch)
+
+    cache.get_or_fetch('http://a.example/', fetch)
+    cache.get_or_fetch('http://b.example/', fetch)
+    assert fetch.calls == {'http://a.example/': 1, 'http://b.example/': 2, 'http://c.example/': 1}
+    assert cache.stats()['evictions'] == 2
+
+
+def test_entries_are_evicted_to_stay_under_max_bytes():
+    cache = FetchCache(max_bytes=2500)
+    fetch = CountingFetch(content='x' * 1000)
+    for name in 'abc':
+        cache.get_or_fetch(f"http://{name}.example/", fetch)
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert stats['bytes'] == 2000
+    assert stats['evictions'] == 1
+
+    # Text added after parsing counts too: b, c with its text, and d don't fit
+    result = cache.get_or_fetch('http://c.example/', fetch)
+    result.text = 'y' * 600
+    cache.get_or_fetch('http://d.example/', fetch)
+    stats = cache.stats()
+    assert stats['size'] == 1
+    assert stats['bytes'] == 1000
+    assert stats['evictions'] == 3
+
+
+def test_hit_rate_counts_hits_and_coalesced_requests():
+    cache = FetchCache()
+    fetch = CountingFetch()
+    assert cache.stats()['hit_rate'] == 0.0
+    for _ in range(4):
+        cache.get_or_fetch('http://example.com/', fetch)
+    cache.get_or_fetch('http://other.example/', fetch)
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['coalesced']) == (3, 2, 0)
+    assert stats['hit_rate'] == pytest.approx(3 / 5)
@@ -0,0 +1,106 @@
+from fingerprint import build_fingerprint_tree, diff_fingerprint_trees, resolve_regions, filter_regions, MAX_DEPTH
+
+
+def _text(n):
+    # Long enough for a block of its own, see MIN_REGION_TEXT
+    return f"Paragraph {n} " + "with enough text to count as a region of its own. " * 2
+
+
+def _page(paragraphs, extra=''):
+    return f"<html><body>{extra}<main>{''.join(f'<p>{p}</p>' for p in paragraphs)}</main></body></html>"
+
+
+def _diff(old, new):
+    return diff_fingerprint_trees(build_fingerprint_tree(old)[0], build_fingerprint_tree(new)[0])
+
+
+def _changes(old, new, watch=None, ignore=None):
+    changed = _diff(old, new)
+    _, soup, paths = build_fingerprint_tree(new)
+    return filter_regions(
+        changed,
+        watch=resolve_regions(soup, paths, watch),
+        ignore=resolve_regions(soup, paths, ignore)
+    )
+
+
+PARAGRAPHS = [_text(1), _text(2), _text(3)]
+
+
+def test_unchanged_page_has_no_changes():
+    assert _diff(_page(PARAGRAPHS), _page(PARAGRAPHS)) == []
+
+
+def test_edit_reports_only_the_edited_block():
+    edited = [_text(1), _text(2) + ' now edited', _text(3)]
+    assert _diff(_page(PARAGRAPHS), _page(edited)) == ['body > main[1] > p[2]']
+
+
+def test_insert_reports_only_the_new_block():
+    assert _diff(_page(PARAGRAPHS), _page([_text(0)] + PARAGRAPHS)) == ['body > main[1] > p[1]']
+
+
+def test_delete_reports_only_the_removed_block():
+    assert _diff(_page(PARAGRAPHS), _page([_text(1), _text(3)])) == ['body > main[1] > p[2]']
+
+
+def test_reordered_blocks_report_their_parent():
+    moved = [_text(3), _text(1), _text(2)]
+    assert _diff(_page(PARAGRAPHS), _page(moved)) == ['body > main[1]']
+
+
+def test_duplicate_siblings_are_paired_in_place():
+    same = [_text(1)] * 3
+    assert _diff(_page(same), _page([_text(1), _text(1) + ' now edited', _text(1)])) == ['body > main[1] > p[2]']
+    assert _diff(_page(same), _page([_text(1), _text(9), _text(1), _text(1)])) == ['body > main[1] > p[2]']
+
+
+def test_blocks_with_an_id_are_named_by_it():
+    old = f'<body><div id="news">{_text(1)}</div></body>'
+    new = f'<body><div id="news">{_text(2)}</div></body>'
+    assert _diff(old, new) == ['body > div#news']
+
+
+def test_small_blocks_are_part_of_their_parent():
+    old = _page(PARAGRAPHS, extra='<div>Price: $10</div>')
+    new = _page(PARAGRAPHS, extra='<div>Price: $12</div>')
+    assert _diff(old, new) == ['body']
+
+
+def test_deep_nesting_is_folded_without_recursion():
+    html = f"<body>{'<div>' * 1000}{_text(1)}{'</div>' * 1000}</body>"
+    tree, _, paths = build_fingerprint_tree(html)
+    assert max(path.count(' > ') for path, _ in paths.values()) == MAX_DEPTH
+
+
+def test_ignore_drops_changes_inside_the_region():
+    old = _page(PARAGRAPHS)
+    new = _page([_text(1), _text(2) + ' now edited', _text(3)])
+    assert _changes(old, new, ignore=['main']) == []
+    assert _changes(old, new, ignore=['main p:nth-of-type(1)']) == ['body > main[1] > p[2]']
+
+
+def test_watch_keeps_only_changes_inside_the_region():
+    old = _page(PARAGRAPHS)
+    new = _page([_text(1) + ' now edited', _text(2) + ' now edited', _text(3)])
+    assert _changes(old, new, watch=['main p:nth-of-type(2)']) == ['body > main[1] > p[2]']
+    assert _changes(old, new, watch=['main p:nth-of-type(3)']) == []
+
+
+def test_ignoring_a_small_block_ignores_only_its_parents_own_text():
+    ad = '<div class="ad">Buy now</div>'
+    old = _page(PARAGRAPHS, extra=ad)
+    edited = _page([_text(1), _text(2) + ' now edited', _text(3)], extra=ad)
+    assert _changes(old, edited, ignore=['.ad']) == ['body > main[1] > p[2]']
+
+    new_ad = _page(PARAGRAPHS, extra='<div class="ad">Buy later</div>')
+    assert _changes(old, new_ad, ignore=['.ad']) == []
+
+
+def test_watching_a_small_block_watches_only_its_parents_own_text():
+    old = _page(PARAGRAPHS, extra='<div class="price">$10</div>')
+    edited = _page([_text(1), _text(2) + ' now edited', _text(3)], extra='<div class="price">$10</div>')
+    assert _changes(old, edited, watch=['.price']) == []
+
+    repriced = _page(PARAGRAPHS, extra='<div class="price">$12</div>')
+    assert _changes(old, repriced, watch=['.price']) == ['body']
@@ -0,0 +1,118 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import rules
+from models import db, User, Website, WatchRule
+from rules import RuleMatcher, parse_number, validate_rule
+from tasks import evaluate_watch_rules
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1,299.00', 1299.0),
+    ('1.299,00', 1299.0),
+    ('$ 12', 12.0),
+    ('12,5', 12.5),
+    ('1,299', 1299.0),
+    ('-3.5', -3.5),
+    ('n/a', None),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == expected
+
+
+def test_validate_rule():
+    assert validate_rule('contains', 'sold out') is None
+    assert validate_rule('number', r'price: (\d+)', '<', 20) is None
+    assert validate_rule('unknown', 'x').startswith('Invalid kind')
+    assert validate_rule('regex', '(unclosed').startswith('Invalid regular expression')
+    assert validate_rule('number', r'(\d+)-(\d+)', '<', 20) == 'Number patterns may contain at most one capture group'
+    assert validate_rule('number', r'\d+', '!=', 20).startswith('Invalid operator')
+
+
+SIGNATURE = (
+    (1, 'contains', 'In Stock', None, None),
+    (2, 'not_contains', 'sold out', None, None),
+    (3, 'contains', 'stock', None, None),
+    (4, 'regex', r'ships in \d+ days', None, None),
+    (5, 'number', r'price:\s*\$?([\d.,]+)', '<', 20),
+    (6, 'contains', 'discontinued', None, None),
+)
+
+
+@pytest.fixture(params=['automaton', 'lookups'])
+def matcher(request, monkeypatch):
+    if request.param == 'automaton' and rules.ahocorasick is None:
+        pytest.skip("needs pyahocorasick")
+    if request.param == 'lookups':
+        monkeypatch.setattr(rules, 'ahocorasick', None)
+    matcher = RuleMatcher(SIGNATURE)
+    assert (matcher.automaton is not None) == (request.param == 'automaton')
+    return matcher
+
+
+def test_evaluate(matcher):
+    results = matcher.evaluate("Widget: in stock, ships in 3 days. Price: $18.50")
+    assert results == {
+        1: (True, None),
+        2: (True, None),
+        3: (True, None),
+        4: (True, None),
+        5: (True, 18.5),
+        6: (False, None),
+    }
+
+
+def test_evaluate_when_nothing_matches(matcher):
+    results = matcher.evaluate("Sold out. Price: $25")
+    assert results == {
+        1: (False, None),
+        2: (False, None),
+        3: (False, None),
+        4: (False, None),
+        5: (False, 25.0),
+        6: (False, None),
+    }
+
+
+def test_slow_patterns_time_out(monkeypatch):
+    monkeypatch.setattr(rules, 'RULE_TIMEOUT', 0.05)
+    matcher = RuleMatcher(((1, 'regex', '(a|aa)+$', None, None), (2, 'contains', 'a', None, None)))
+    assert matcher.evaluate('a' * 5000 + 'b') == {2: (True, None)}
+
+
+def test_patterns_see_only_the_start_of_the_text(monkeypatch):
+    monkeypatch.setattr(rules, 'MAX_RULE_TEXT', 100)
+    matcher = RuleMatcher(((1, 'regex', 'needle', None, None), (2, 'contains', 'needle', None, None)))
+    assert matcher.evaluate('x' * 200 + 'needle') == {1: (False, None), 2: (True, None)}
+
+
+def test_first_check_records_a_baseline_then_rules_fire_when_they_become_true(app):
+    user = User(username='rules')
+    db.session.add(user)
+    db.session.flush()
+    website = Website.create('http://example.com/', 24, user.id)
+    db.session.add(website)
+    db.session.flush()
+    rule = WatchRule(website_id=website.id, kind='contains', pattern='back in stock')
+    db.session.add(rule)
+    db.session.commit()
+    assert rule.is_met is None
+
+    now = datetime.now(timezone.utc)
+    # Already true on the first check: only recorded
+    assert evaluate_watch_rules(website, 'Back in stock!', now) == []
+    assert rule.is_met is True
+    assert rule.last_triggered is None
+    assert website.last_change is None
+
+    assert evaluate_watch_rules(website, 'Sold out', now) == []
+    assert rule.is_met is False
+
+    assert evaluate_watch_rules(website, 'Back in stock!', now) == [rule]
+    assert rule.is_met is True
+    assert rule.last_triggered == now
+    assert website.last_change == now
+
+    # Still true: no new trigger
+    assert evaluate_watch_rules(website, 'Back in stock!', now) == []
@@ -0,0 +1,183 @@
+import http.server
+import multiprocessing
+import os
+import socketserver
+import threading
+import time
+
+import pytest
+
+from conftest import make_app
+from dispatcher import CheckDispatcher
+from models import db, User, Website, CheckResult, CheckWorker
+from sharding import HashRing, ShardWorker
+
+SITES = 96
+
+
+def _workers(ids, nodes):
+    workers = []
+    for worker_id in ids:
+        worker = ShardWorker(worker_id)
+        worker.ring = HashRing(nodes)
+        workers.append(worker)
+    return workers
+
+
+def test_every_website_has_exactly_one_owner():
+    nodes = [f"worker-{i}" for i in range(8)]
+    workers = _workers(nodes, nodes)
+    for website_id in range(1, 5001):
+        assert sum(worker.owns(website_id) for worker in workers) == 1
+
+
+def test_only_the_departed_workers_websites_move():
+    nodes = [f"worker-{i}" for i in range(8)]
+    before = HashRing(nodes)
+    after = HashRing([node for node in nodes if node != 'worker-3'])
+
+    moved = 0
+    for website_id in range(1, 5001):
+        owner = before.get_node(website_id)
+        if owner == 'worker-3':
+            moved += 1
+            assert after.get_node(website_id) != 'worker-3'
+        else:
+            assert after.get_node(website_id) == owner
+    assert moved > 0
+
+
+def test_joining_worker_only_takes_websites():
+    nodes = [f"worker-{i}" for i in range(4)]
+    before = HashRing(nodes)
+    after = HashRing(nodes + ['worker-new'])
+    for website_id in range(1, 5001):
+        owner = after.get_node(website_id)
+        assert owner in (before.get_node(website_id), 'worker-new')
+
+
+def _page(paragraphs=1000):
+    """A large page, so each check's time goes to decoding, parsing and hashing"""
+    blocks = ''.join(
+        f"<div class='item'><h2>Item {i}</h2><p>{'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 2}{i}</p></div>"
+        for i in range(paragraphs)
+    )
+    return f"<html><body><main>{blocks}</main></body></html>".encode()
+
+
+class _PageHandler(http.server.BaseHTTPRequestHandler):
+    body = _page()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def _run_worker(db_path, worker_id, workers, barrier, results):
+    """One check worker as run_worker() sets it up, minus the APScheduler loop"""
+    app = make_app(db_path)
+    with app.app_context():
+        worker = ShardWorker(worker_id)
+        while len(worker.ring.nodes) < workers:
+            worker.heartbeat()
+            time.sleep(0.05)
+        dispatcher = CheckDispatcher(app, owns=worker.owns, shard=worker.shard)
+        dispatcher.sync()
+        dispatcher.start_window()
+
+    barrier.wait()
+    started = time.monotonic()
+    checked = 0
+    with app.app_context():
+        while True:
+            count = dispatcher.dispatch(time.time())
+            if not count:
+                break
+            checked += count
+    results.put((checked, checked / (time.monotonic() - started)))
+
+
+def _throughput(ctx, db_path, workers):
+    barrier = ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_run_worker, args=(db_path, f"w{workers}-{i}", workers, barrier, results))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    finished = [results.get(timeout=300) for _ in processes]
+    for process in processes:
+        process.join()
+    assert sum(checked for checked, _ in finished) == SITES
+    # Checks per second across the workers while they run. How soon the last
+    # one finishes also depends on how evenly the ring splits the websites.
+    return sum(rate for _, rate in finished)
+
+
+@pytest.fixture
+def shards_db(tmp_path, monkeypatch):
+    """A database of SITES websites served by a local server, checked once by each test round"""
+    try:
+        ctx = multiprocessing.get_context('fork')
+    except ValueError:
+        pytest.skip("needs fork")
+    # Measure the workers, not the capacity limit
+    monkeypatch.setattr('dispatcher.CHECK_CAPACITY', SITES * 10)
+
+    server = _Server(('127.0.0.1', 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    db_path = tmp_path / 'shards.db'
+    app = make_app(db_path)
+    with app.app_context():
+        db.create_all()
+        user = User(username='shards', check_quota=SITES * 10)
+        db.session.add(user)
+        db.session.flush()
+        for i in range(SITES):
+            db.session.add(Website.create(f"http://127.0.0.1:{port}/{i}", 24, user.id))
+        db.session.commit()
+        db.engine.dispose()
+
+    def run(workers):
+        rate = _throughput(ctx, db_path, workers)
+        with app.app_context():
+            assert CheckResult.query.count() == SITES
+            assert db.session.query(CheckResult.website_id).distinct().count() == SITES
+            CheckResult.query.delete()
+            CheckWorker.query.delete()
+            Website.query.update({Website.last_check: None, Website.fingerprint: None})
+            db.session.commit()
+            db.engine.dispose()
+        return rate
+
+    yield run
+    server.shutdown()
+
+
+def test_workers_check_each_website_once(shards_db):
+    shards_db(4)
+
+
+def test_throughput_scales_with_workers(shards_db):
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    counts = [workers for workers in (1, 2, 4, 8) if workers <= cores]
+    if len(counts) < 2:
+        pytest.skip("needs at least 2 CPUs")
+
+    rates = {workers: shards_db(workers) for workers in counts}
+    for workers, rate in rates.items():
+        assert rate >= 0.75 * workers * rates[1], rates
@@ -25,4 +25,36 @@ def send_unreachable_notification(user, website):
     Website Change Monitor
     '''
     
-    mail.send(msg) 
\ No newline at end of file
+    mail.send(msg) 
+
+def send_rule_notification(user, website, rules):
+    if not user.notifications_enabled or not user.notification_email:
+        return
+        
+    lines = '\n'.join(f"    - {describe_rule(rule)}" for rule in rules)
+    msg = Message(
+        'Website Watch Rule Alert',
+        sender=current_app.config['MAIL_DEFAULT_SENDER'],
+        recipients=[user.notification_email]
+    )
+    
+    msg.body = f'''
+    Hello {user.username},
+    
+    The following watch rules for {website.url} were triggered:
+{lines}
+    
+    Best regards,
+    Website Change Monitor
+    '''
+    
+    mail.send(msg)
+
+def describe_rule(rule):
+    if rule.kind == 'contains':
+        return f'"{rule.pattern}" appeared'
+    if rule.kind == 'not_contains':
+        return f'"{rule.pattern}" disappeared'
+    if rule.kind == 'regex':
+        return f'/{rule.pattern}/ matched'
+    return f'/{rule.pattern}/ is {rule.last_value:g} ({rule.operator} {rule.threshold:g})'
\ No newline at end of file